@@ -1,11 +1,24 @@
 import streamlit as st
-import json
 import sqlite3
 import os
+import math
 import pandas as pd
 import plotly.express as px
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from kompendium import load_catalog, process_data
+from catalog_store import (init_catalog_schema, import_catalog, get_filter_options, query_control_ids,
+                           count_statuses, export_query, WITHOUT_STATUS)
+from snapshots import init_snapshot_schema, record_daily_snapshot, load_status_trend, load_group_trend
+from report import generate_report, html_to_pdf, load_statuses
+from sync import (init_sync_schema, get_instance_id, get_peers, get_status_seq, next_status_seq, export_changeset,
+                  import_changeset)
+from planner import EFFORT_DAYS, RemediationPlanner, load_planning_data, workdays_to_date
+from writer import StatusChange, StatusTask, StatusWriter
+from similarity import SimilarityIndex
+from migration import migrate_statuses, text_stream, write_unmatched
+from evidence import (init_evidence_schema, store_evidence, link_evidence, unlink_evidence,
+                      get_control_evidence, list_evidence, read_evidence, format_size)
 
 # Initialize SQLite database
 def init_db():
@@ -28,6 +41,14 @@ def init_db():
     if 'changed_by' not in columns:
         c.execute('ALTER TABLE control_status ADD COLUMN changed_by TEXT')
     
+    # Assignee and due date (ISO date) for task tracking
+    if 'assignee' not in columns:
+        c.execute('ALTER TABLE control_status ADD COLUMN assignee TEXT')
+    if 'due_date' not in columns:
+        c.execute('ALTER TABLE control_status ADD COLUMN due_date TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_control_status_assignee ON control_status (assignee, status)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_control_status_due_date ON control_status (due_date, status)')
+    
     # Create users table for name suggestions
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -37,22 +58,60 @@ def init_db():
         )
     ''')
     
+    # Catalog tables for SQL-side filtering and exports
+    init_catalog_schema(conn)
+    
+    # Sequence numbers, origin and watermarks for replication between installations
+    init_sync_schema(conn)
+    
+    # Create tables for the daily status snapshots
+    init_snapshot_schema(conn)
+    
+    # Create tables for evidence files and their links to controls
+    init_evidence_schema(conn)
+    
     # Enable foreign key constraints
     c.execute('PRAGMA foreign_keys = ON')
     conn.commit()
     return conn
 
+def _delete_statuses(conn: sqlite3.Connection) -> None:
+    c = conn.cursor()
+    c.execute('DELETE FROM control_status')
+    next_status_seq(c)
+    conn.commit()
+
 def reset_database():
     """Reset all entries in the database"""
-    c = db_conn.cursor()
-    c.execute('DELETE FROM control_status')
-    db_conn.commit()
+    run_write_task(_delete_statuses)
     st.sidebar.success("Datenbank wurde zurückgesetzt!")
     st.rerun()
 
 # Initialize database
 db_conn = init_db()
 
+# Seconds a save waits for its commit
+WRITE_TIMEOUT = 30
+# Seconds an import, migration or reset may take
+BULK_WRITE_TIMEOUT = 600
+
+@st.cache_resource
+def load_status_writer() -> StatusWriter:
+    """One writer thread per server process; status saves of all sessions are group-committed"""
+    return StatusWriter('grundschutz_status.db')
+
+def get_status_writer() -> StatusWriter:
+    """The shared writer; a writer whose thread has stopped is replaced"""
+    writer = load_status_writer()
+    if not writer.is_alive():
+        load_status_writer.clear()
+        writer = load_status_writer()
+    return writer
+
+def run_write_task(task: StatusTask, timeout: float = BULK_WRITE_TIMEOUT) -> Any:
+    """Run a bulk write of control_status on the writer thread and return its result"""
+    return get_status_writer().submit(task).result(timeout=timeout)
+
 # Now set page config
 st.set_page_config(
     page_title="Grundschutz++ Dashboard",
@@ -154,15 +213,23 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_resource
 def load_data():
+    """Load and process the Kompendium once per process; the read-only records are shared by all sessions"""
     try:
-        with open('Grundschutz++-Kompendium.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        catalog = load_catalog('Grundschutz++-Kompendium.json')
+        # Materialize a new Kompendium version into the database for SQL queries
+        import_catalog(db_conn, catalog)
+        return process_data(catalog)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None
 
+@st.cache_resource(max_entries=2)
+def load_similarity_index(_controls: List[Dict], catalog_version: str) -> SimilarityIndex:
+    """MinHash/LSH index over the control texts, built once per catalog version"""
+    return SimilarityIndex(_controls)
+
 def get_control_status(control_id: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Get the status, notes, and name of the person who last changed the control
@@ -178,6 +245,42 @@ def get_control_status(control_id: str) -> Tuple[Optional[str], Optional[str], O
                 result[2] if len(result) > 2 and result[2] else None)
     return (None, None, None)
 
+def get_control_assignment(control_id: str) -> Tuple[Optional[str], Optional[date]]:
+    """
+    Get the assigned person and due date of a control
+    Returns: (assignee, due_date)
+    """
+    c = db_conn.cursor()
+    c.execute('SELECT assignee, due_date FROM control_status WHERE control_id = ?', (control_id,))
+    result = c.fetchone()
+    if result:
+        return (result[0] if result[0] else None,
+                date.fromisoformat(result[1]) if result[1] else None)
+    return (None, None)
+
+def get_assignees() -> List[str]:
+    """All persons controls are assigned to"""
+    c = db_conn.cursor()
+    c.execute('''
+        SELECT DISTINCT assignee FROM control_status
+        WHERE assignee IS NOT NULL AND assignee != ''
+        ORDER BY assignee
+    ''')
+    return [row[0] for row in c.fetchall()]
+
+def get_workload() -> List[Tuple[str, Optional[str], int, int]]:
+    """(assignee, status, number of controls, of which open and overdue) for all assigned controls"""
+    c = db_conn.cursor()
+    c.execute('''
+        SELECT assignee, NULLIF(status, ''), COUNT(*),
+               SUM(CASE WHEN due_date < date('now', 'localtime')
+                         AND (status IS NULL OR status IN ('', 'nicht_erfuellt')) THEN 1 ELSE 0 END)
+        FROM control_status
+        WHERE assignee IS NOT NULL AND assignee != ''
+        GROUP BY assignee, status
+    ''')
+    return c.fetchall()
+
 def get_previous_users() -> List[str]:
     """Get a list of previously used user names, most recent first"""
     c = db_conn.cursor()
@@ -188,138 +291,26 @@ def get_previous_users() -> List[str]:
     ''')
     return [row[0] for row in c.fetchall()]
 
-def save_user_name(name: str) -> None:
-    """Save or update a user name with current timestamp"""
-    c = db_conn.cursor()
-    c.execute('''
-        INSERT INTO users (name, last_used) 
-        VALUES (?, CURRENT_TIMESTAMP)
-        ON CONFLICT(name) DO UPDATE SET last_used = CURRENT_TIMESTAMP
-    ''', (name,))
-    db_conn.commit()
-
-def save_control_status(control_id: str, status: str, notes: str = "", changed_by: str = "") -> None:
-    """Save control status with the name of the person making the change"""
-    c = db_conn.cursor()
-    c.execute('''
-        INSERT OR REPLACE INTO control_status 
-        (control_id, status, notes, changed_by, updated_at)
-        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (control_id, status, notes, changed_by))
-    db_conn.commit()
-    
-    # Save the user name for future suggestions
-    if changed_by:
-        save_user_name(changed_by)
-
-def process_data(data: Dict) -> Dict:
-    if not data:
-        return {}
-    
-    catalog = data.get('catalog', {})
-    groups = catalog.get('groups', [])
-    all_controls = []
-    
-    # Create a dictionary to store all parameters by ID
-    parameters = {}
-    
-    # First pass: collect all parameters
-    def collect_params(control):
-        for param in control.get('params', []):
-            param_id = param.get('id')
-            if param_id and 'label' in param:
-                parameters[param_id] = param['label']
-    
-    # Collect parameters from all controls
-    for group in groups:
-        # Process group-level controls
-        for control in group.get('controls', []):
-            collect_params(control)
-            
-        # Process subgroup controls
-        for subgroup in group.get('groups', []):
-            for control in subgroup.get('controls', []):
-                collect_params(control)
-    
-    # Function to process a single control with parameter replacement
-    def process_control(control, group_data, subgroup_data=None):
-        statement = next((part for part in control.get('parts', []) 
-                        if part.get('name') == 'statement'), {})
-        guidance = next((part for part in control.get('parts', []) 
-                       if part.get('name') == 'guidance'), {})
-        
-        # Process statement to replace parameter placeholders
-        statement_text = statement.get('prose', '')
-        if '{{' in statement_text and '}}' in statement_text:
-            import re
-            param_pattern = r'\{\{\s*insert:\s*param,\s*([^}]+)\s*\}\}'
-            
-            def replace_param(match):
-                param_id = match.group(1).strip()
-                # If parameter not found, show the ID in brackets
-                return parameters.get(param_id, f'[{param_id}]')
-            
-            statement_text = re.sub(param_pattern, replace_param, statement_text)
-        
-        # Extract additional fields from props
-        def get_prop_value(part, prop_name):
-            return next((prop['value'] for prop in part.get('props', []) 
-                       if prop.get('name') == prop_name), None)
-        
-        control_data = {
-            'id': control.get('id', ''),
-            'class': control.get('class', ''),
-            'title': control.get('title', ''),
-            'effort_level': next((prop['value'] for prop in control.get('props', []) 
-                                if prop.get('name') == 'effort_level'), 'N/A'),
-            'statement': statement_text,
-            'guidance': guidance.get('prose', ''),
-            'group_id': group_data.get('id', ''),
-            'group_title': group_data.get('title', ''),
-            'type': 'group_control',
-            # Extract additional fields from statement props
-            'ergebnis': get_prop_value(statement, 'ergebnis'),
-            'handlungsworte': get_prop_value(statement, 'handlungsworte'),
-            'präzisierung': get_prop_value(statement, 'präzisierung'),
-            'dokumentation': get_prop_value(statement, 'dokumentation'),
-            # Extract tags from control props
-            'tags': [prop['value'] for prop in control.get('props', []) 
-                    if prop.get('name') == 'tag']
-        }
-        
-        if subgroup_data:
-            control_data.update({
-                'subgroup_id': subgroup_data.get('id', ''),
-                'subgroup_title': subgroup_data.get('title', ''),
-                'type': 'subgroup_control'
-            })
-            
-        return control_data
-    
-    # Process all controls with parameter replacement
-    for group in groups:
-        # Process group-level controls
-        for control in group.get('controls', []):
-            control_data = process_control(control, group)
-            all_controls.append(control_data)
-            
-        # Process subgroup controls
-        for subgroup in group.get('groups', []):
-            for control in subgroup.get('controls', []):
-                control_data = process_control(control, group, subgroup)
-                all_controls.append(control_data)
-    
-    return {
-        'groups': groups,
-        'all_controls': all_controls,
-        'total_controls': len(all_controls),
-        'total_groups': len(groups),
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+def save_control_status(control_id: str, status: str, notes: str = "", changed_by: str = "",
+                        assignee: str = "", due_date: Optional[date] = None) -> None:
+    """
+    Save control status with the name of the person making the change.
+    The write goes through the shared writer thread; returns once it is committed.
+    """
+    change = StatusChange(control_id, status, notes, changed_by, assignee or None,
+                          due_date.isoformat() if due_date else None)
+    get_status_writer().submit(change).result(timeout=WRITE_TIMEOUT)
+
+def save_control_assignment(control_id: str, assignee: str, due_date: Optional[date], changed_by: str) -> None:
+    """Save only the assigned person and due date; status and notes stay as they are"""
+    change = StatusChange(control_id, None, changed_by=changed_by, assignee=assignee or None,
+                          due_date=due_date.isoformat() if due_date else None)
+    get_status_writer().submit(change).result(timeout=WRITE_TIMEOUT)
 
 def display_control_status(control_id: str) -> None:
     # Get current status, notes, and who last changed it
     status, notes, last_changed_by = get_control_status(control_id)
+    assignee, due_date = get_control_assignment(control_id)
     
     # Create a form to handle the submission
     with st.form(key=f'form_{control_id}'):
@@ -420,20 +411,50 @@ def display_control_status(control_id: str) -> None:
             help="Pflichtfeld für 'Erfüllt' und 'Entbehrlich'" if is_required else ""
         )
         
+        # Assignment section
+        st.markdown("---")
+        st.markdown("### 📅 Zuständigkeit und Termin")
+        col1, col2 = st.columns(2)
+        with col1:
+            assignee_name = st.text_input(
+                "Zuständige Person",
+                value=assignee or "",
+                key=f"{control_id}_assignee",
+                placeholder="Vorname Nachname"
+            )
+        with col2:
+            due_date_value = st.date_input(
+                "Termin",
+                value=due_date,
+                key=f"{control_id}_due_date",
+                format="DD.MM.YYYY"
+            )
+        
+        # Controls without a status can be assigned as well
+        assignment_changed = (assignee_name.strip() != (assignee or '')) or due_date_value != due_date
+        
         # Submit button
         submit_button = st.form_submit_button(
             "Speichern",
-            type="primary" if new_status and user_name.strip() else "secondary"
+            type="primary" if (new_status or assignment_changed) and user_name.strip() else "secondary"
         )
         
         # Handle form submission
-        if submit_button and new_status:
+        if submit_button and not new_status and assignment_changed:
+            if not user_name.strip():
+                st.error("Bitte geben Sie Ihren Namen an.")
+            else:
+                save_control_assignment(control_id, assignee_name.strip(), due_date_value, user_name.strip())
+                st.success("Zuständigkeit erfolgreich gespeichert!")
+                st.rerun()
+        elif submit_button and new_status:
             if not user_name.strip():
                 st.error("Bitte geben Sie Ihren Namen an.")
             elif new_status in ["erfuellt", "entbehrlich"] and not notes_text.strip():
                 st.error("Bitte geben Sie eine Begründung an.")
             else:
-                save_control_status(control_id, new_status, notes_text, user_name.strip())
+                save_control_status(control_id, new_status, notes_text, user_name.strip(),
+                                    assignee_name.strip(), due_date_value)
                 st.success("Status erfolgreich gespeichert!"
                            f"\n\n**Status:** {selected_status}"
                            f"\n**Verantwortlich:** {user_name.strip()}")
@@ -454,12 +475,78 @@ def display_control_status(control_id: str) -> None:
         if not user_name.strip():
             st.error("Bitte geben Sie Ihren Namen an.")
         else:
-            save_control_status(control_id, new_status, notes_text, user_name.strip())
+            save_control_status(control_id, new_status, notes_text, user_name.strip(),
+                                assignee_name.strip(), due_date_value)
             # Show success message
             st.success("Status erfolgreich gespeichert!")
             # Force a rerun to update the UI
             st.rerun()
 
+def display_control_evidence(control_id: str, evidence_files: List[Tuple[str, str, int, int]]) -> None:
+    """
+    List, download, upload and link the evidence files of a control.
+    evidence_files is list_evidence(), queried once per rerun for all cards.
+    """
+    linked = get_control_evidence(db_conn, control_id)
+    
+    # Outside the status form, so the name is known before that form is submitted
+    user_name = st.text_input(
+        "Name der verantwortlichen Person",
+        value=st.session_state.get(f"{control_id}_name_input", ""),
+        key=f"{control_id}_evidence_name",
+        placeholder="Vorname Nachname"
+    ).strip()
+    
+    if linked:
+        for sha256, file_name, size, mime_type in linked:
+            col1, col2, col3 = st.columns([4, 1, 1])
+            with col1:
+                st.text(f"{file_name} ({format_size(size)})")
+            with col2:
+                # The blob is only read when the download is requested, not while the card renders
+                st.download_button(
+                    "⬇️",
+                    data=lambda sha256=sha256: read_evidence(sha256),
+                    file_name=file_name,
+                    mime=mime_type or 'application/octet-stream',
+                    key=f"{control_id}_evidence_download_{sha256}"
+                )
+            with col3:
+                if st.button("Entfernen", key=f"{control_id}_evidence_unlink_{sha256}", disabled=not user_name):
+                    unlink_evidence(db_conn, control_id, sha256)
+                    st.rerun()
+    else:
+        st.caption("Noch keine Nachweise verknüpft.")
+    
+    uploaded_files = st.file_uploader(
+        "Dateien hochladen",
+        accept_multiple_files=True,
+        key=f"{control_id}_evidence_upload"
+    )
+    
+    # Files already stored for other controls can be linked without uploading them again
+    linked_hashes = {row[0] for row in linked}
+    available = {sha256: f"{file_name} ({format_size(size)}, {count} Kontrollen)"
+                 for sha256, file_name, size, count in evidence_files
+                 if sha256 not in linked_hashes}
+    selected_hashes = []
+    if available:
+        selected_hashes = st.multiselect(
+            "Vorhandene Nachweise verknüpfen",
+            options=list(available.keys()),
+            format_func=lambda sha256: available[sha256],
+            key=f"{control_id}_evidence_select"
+        )
+    
+    if st.button("Nachweise speichern", key=f"{control_id}_evidence_save",
+                 disabled=not user_name or (not uploaded_files and not selected_hashes)):
+        for uploaded_file in uploaded_files or []:
+            sha256 = store_evidence(db_conn, uploaded_file, uploaded_file.name, uploaded_file.type or '', user_name)
+            link_evidence(db_conn, control_id, sha256, user_name)
+        for sha256 in selected_hashes:
+            link_evidence(db_conn, control_id, sha256, user_name)
+        st.rerun()
+
 def get_status_badge(status: Optional[str]) -> str:
     if status == "erfuellt":
         return '<span class="status-badge erfuellt-badge">Erfüllt</span>'
@@ -469,7 +556,39 @@ def get_status_badge(status: Optional[str]) -> str:
         return '<span class="status-badge entbehrlich-badge">Entbehrlich</span>'
     return ""
 
-def display_control(control: Dict) -> None:
+def display_similar_controls(control_id: str, similar: List[Tuple[str, float]],
+                             controls_by_id: Dict[str, Dict]) -> None:
+    """Controls with similar texts, with the option to take over their status and notes"""
+    # Outside the status form, so the name is known before the form is submitted
+    user_name = st.text_input(
+        "Name der verantwortlichen Person",
+        value=st.session_state.get(f"{control_id}_name_input", ""),
+        key=f"{control_id}_copy_name",
+        placeholder="Vorname Nachname"
+    ).strip()
+    for other_id, score in similar:
+        other_status, other_notes, _ = get_control_status(other_id)
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(
+                f"**{other_id}** - {controls_by_id[other_id].get('title', '')} "
+                f"({score * 100:.0f} % Ähnlichkeit) {get_status_badge(other_status)}",
+                unsafe_allow_html=True
+            )
+        with col2:
+            if st.button("Status übernehmen", key=f"{control_id}_copy_from_{other_id}",
+                         disabled=not other_status or not user_name,
+                         help=f"Status und Bemerkungen von {other_id} übernehmen"):
+                assignee, due_date = get_control_assignment(control_id)
+                notes = f"{other_notes}\n(Übernommen von {other_id})" if other_notes else f"Übernommen von {other_id}"
+                save_control_status(control_id, other_status, notes, user_name, assignee or "", due_date)
+                # Let the status form show the copied values
+                for key in (f"{control_id}_status", f"{control_id}_notes"):
+                    st.session_state.pop(key, None)
+                st.rerun()
+
+def display_control(control: Dict, similarity_index: SimilarityIndex, controls_by_id: Dict[str, Dict],
+                    evidence_files: List[Tuple[str, str, int, int]]) -> None:
     status, _, _ = get_control_status(control['id'])
     status_class = f"status-{status.replace('_', '-')}" if status else ""
     
@@ -560,9 +679,314 @@ def display_control(control: Dict) -> None:
     with st.expander("Status setzen", expanded=status is not None):
         display_control_status(control['id'])
     
+    with st.expander("Nachweise"):
+        display_control_evidence(control['id'], evidence_files)
+    
+    # Most controls have no similar ones; only those get the section
+    similar = [(other_id, score) for other_id, score in similarity_index.similar(control['id'])
+               if other_id in controls_by_id]
+    if similar:
+        with st.expander(f"Ähnliche Kontrollen ({len(similar)})"):
+            display_similar_controls(control['id'], similar, controls_by_id)
+    
     st.markdown("---")
 
-def show_status_dashboard():
+@st.cache_data(max_entries=4)
+def load_trends(_controls: List[Dict], revision: int, catalog_version: str, day: str) -> Tuple[List, List]:
+    """
+    Status and per-group trend from the snapshots.
+    Cached per status revision and day, so the stored vectors are only unpacked after a write.
+    """
+    control_groups = {c['id']: c.get('group_title', '') for c in _controls}
+    return load_status_trend(db_conn), load_group_trend(db_conn, control_groups)
+
+def show_status_trend(controls: List[Dict], catalog_version: str) -> None:
+    """Show status history, burndown and per-group progress from the daily snapshots"""
+    st.subheader("Verlauf")
+    
+    trend, group_trend = load_trends(controls, get_status_seq(db_conn), catalog_version, date.today().isoformat())
+    if not trend:
+        st.info("Noch keine Verlaufsdaten vorhanden.")
+        return
+    
+    df = pd.DataFrame([{'Datum': day, **counts} for day, counts in trend])
+    df['Datum'] = pd.to_datetime(df['Datum'])
+    df['offen'] = df['nicht_erfuellt'] + df['ohne_status']
+    
+    fig = px.line(
+        df.rename(columns={
+            'erfuellt': 'Erfüllt',
+            'nicht_erfuellt': 'Nicht erfüllt',
+            'entbehrlich': 'Entbehrlich',
+            'ohne_status': 'Ohne Status'
+        }),
+        x='Datum',
+        y=['Erfüllt', 'Nicht erfüllt', 'Entbehrlich', 'Ohne Status'],
+        title='Entwicklung der Kontrollen nach Status',
+        color_discrete_map={
+            'Erfüllt': '#28a745',
+            'Nicht erfüllt': '#dc3545',
+            'Entbehrlich': '#ffc107',
+            'Ohne Status': '#6c757d'
+        }
+    )
+    fig.update_layout(yaxis_title='Anzahl', legend_title='Status')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    fig = px.area(df, x='Datum', y='offen', title='Burndown: offene Kontrollen')
+    fig.update_layout(yaxis_title='Offene Kontrollen')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Progress per group
+    if group_trend:
+        df = pd.DataFrame([
+            {
+                'Datum': day,
+                'Gruppe': group,
+                'Fortschritt': (counts['erfuellt'] + counts['entbehrlich']) / sum(counts.values()) * 100
+            }
+            for day, group, counts in group_trend
+        ])
+        df['Datum'] = pd.to_datetime(df['Datum'])
+        fig = px.line(df, x='Datum', y='Fortschritt', color='Gruppe', title='Fortschritt je Gruppe')
+        fig.update_layout(yaxis_title='Fortschritt (%)', yaxis_range=[0, 100])
+        st.plotly_chart(fig, use_container_width=True)
+
+# Dimensions offered by the analytics view: label -> column of the analytics frame
+ANALYTICS_DIMENSIONS = {
+    'Gruppe': 'group_title',
+    'Untergruppe': 'subgroup_title',
+    'Klasse': 'class',
+    'Aufwand': 'effort_level',
+    'Modalverb': 'modalverb',
+    'Verantwortlich': 'responsible'
+}
+
+STATUS_LABELS = {
+    'erfuellt': 'Erfüllt',
+    'nicht_erfuellt': 'Nicht erfüllt',
+    'entbehrlich': 'Entbehrlich'
+}
+
+@st.cache_data(max_entries=4)
+def load_analytics_frame(_controls: List[Dict], revision: int, catalog_version: str) -> pd.DataFrame:
+    """
+    Join all controls with their status in one vectorized merge.
+    Cached per status revision, so the frame is only rebuilt after a write.
+    """
+    controls_df = pd.DataFrame(_controls).reindex(
+        columns=['id'] + list(ANALYTICS_DIMENSIONS.values())
+    ).drop(columns=['responsible'])
+    status_df = pd.read_sql_query(
+        'SELECT control_id AS id, status, assignee AS responsible FROM control_status',
+        db_conn
+    )
+    df = controls_df.merge(status_df, on='id', how='left')
+    df['status'] = df['status'].map(STATUS_LABELS).fillna('Ohne Status')
+    for column in ANALYTICS_DIMENSIONS.values():
+        df[column] = df[column].fillna('').replace('', 'N/A').astype(str)
+    return df
+
+@st.cache_data(max_entries=64)
+def build_crosstab(_df: pd.DataFrame, revision: int, catalog_version: str, rows: str, columns: str,
+                   statuses: Tuple[str, ...], modalverbs: Tuple[str, ...]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Pivot the analytics frame; returns (heatmap matrix, ranked combinations)"""
+    df = _df[_df['status'].isin(statuses)]
+    if modalverbs:
+        df = df[df['modalverb'].isin(modalverbs)]
+    matrix = pd.crosstab(df[ANALYTICS_DIMENSIONS[rows]], df[ANALYTICS_DIMENSIONS[columns]])
+    ranked = (
+        df.groupby([ANALYTICS_DIMENSIONS[rows], ANALYTICS_DIMENSIONS[columns]])
+        .size()
+        .sort_values(ascending=False)
+        .reset_index(name='Anzahl')
+        .rename(columns={ANALYTICS_DIMENSIONS[rows]: rows, ANALYTICS_DIMENSIONS[columns]: columns})
+    )
+    return matrix, ranked
+
+def show_analytics(controls: List[Dict], catalog_version: str) -> None:
+    """Cross-tab view showing where the open work is concentrated"""
+    st.header("Analyse")
+    
+    revision = get_status_seq(db_conn)
+    df = load_analytics_frame(controls, revision, catalog_version)
+    
+    dimensions = list(ANALYTICS_DIMENSIONS.keys())
+    col1, col2 = st.columns(2)
+    with col1:
+        rows = st.selectbox("Zeilen", options=dimensions, index=0, key="analytics_rows")
+    with col2:
+        columns = st.selectbox("Spalten", options=dimensions, index=3, key="analytics_columns")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        statuses = st.multiselect(
+            "Status",
+            options=list(STATUS_LABELS.values()) + ['Ohne Status'],
+            default=['Nicht erfüllt', 'Ohne Status'],
+            key="analytics_statuses"
+        )
+    with col2:
+        modalverbs = st.multiselect(
+            "Modalverb",
+            options=sorted(df['modalverb'].unique()),
+            default=[],
+            key="analytics_modalverbs"
+        )
+    
+    if rows == columns:
+        st.warning("Bitte unterschiedliche Dimensionen für Zeilen und Spalten wählen.")
+        return
+    
+    matrix, ranked = build_crosstab(df, revision, catalog_version, rows, columns,
+                                    tuple(statuses), tuple(modalverbs))
+    if matrix.empty:
+        st.info("Keine Kontrollen für die gewählten Filter.")
+        return
+    
+    fig = px.imshow(
+        matrix,
+        text_auto=True,
+        aspect='auto',
+        color_continuous_scale='Reds',
+        labels={'x': columns, 'y': rows, 'color': 'Anzahl'},
+        title=f'Kontrollen nach {rows} und {columns}'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Rangliste")
+    st.dataframe(ranked, use_container_width=True, hide_index=True)
+
+def show_workload() -> None:
+    """Stacked bar chart of the assigned controls per person"""
+    workload = get_workload()
+    if not workload:
+        return
+    
+    st.subheader("Arbeitslast je Person")
+    df = pd.DataFrame(workload, columns=['Person', 'Status', 'Anzahl', 'Überfällig'])
+    df['Status'] = df['Status'].map(STATUS_LABELS).fillna('Ohne Status')
+    fig = px.bar(
+        df,
+        x='Person',
+        y='Anzahl',
+        color='Status',
+        color_discrete_map={
+            'Erfüllt': '#28a745',
+            'Nicht erfüllt': '#dc3545',
+            'Entbehrlich': '#ffc107',
+            'Ohne Status': '#6c757d'
+        }
+    )
+    fig.update_layout(barmode='stack', xaxis_title='', yaxis_title='Kontrollen')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    overdue = df.groupby('Person')['Überfällig'].sum()
+    overdue = overdue[overdue > 0]
+    if not overdue.empty:
+        st.caption("Überfällig: " + ", ".join(f"{person} ({count})" for person, count in overdue.items()))
+
+# Planners kept per session (scope and team); older ones are dropped
+MAX_PLANNERS = 8
+
+def get_planner(scope: Tuple[str, ...], team: Dict[str, float], catalog_version: str) -> RemediationPlanner:
+    """
+    Planner for a scope and team, kept in the session.
+    Status changes since the last run are applied incrementally instead of planning from scratch.
+    """
+    planners = st.session_state.setdefault('planners', {})
+    key = (catalog_version, scope, tuple(sorted(team.items())))
+    revision = get_status_seq(db_conn)
+    if key not in planners:
+        controls, requires, statuses = load_planning_data(db_conn)
+        planners[key] = {
+            'planner': RemediationPlanner(controls, requires, statuses, team, scope),
+            'statuses': statuses,
+            'revision': revision
+        }
+        while len(planners) > MAX_PLANNERS:
+            planners.pop(next(iter(planners)))
+    entry = planners[key]
+    if entry['revision'] != revision:
+        c = db_conn.cursor()
+        c.execute('SELECT control_id, status FROM control_status')
+        statuses = dict(c.fetchall())
+        for control_id in set(statuses) | set(entry['statuses']):
+            if statuses.get(control_id) != entry['statuses'].get(control_id):
+                entry['planner'].update_status(control_id, statuses.get(control_id))
+        entry['statuses'] = statuses
+        entry['revision'] = revision
+    return entry['planner']
+
+def show_planning(filtered_controls: List[Dict], controls_by_id: Dict[str, Dict], catalog_version: str) -> None:
+    """Schedule of the open controls in the current filter onto the team"""
+    st.header("Planung")
+    st.caption("Offene Kontrollen der aktuellen Filterauswahl, inklusive offener Voraussetzungen "
+               "('required'-Verweise). Aufwand je Stufe: "
+               + ", ".join(f"{level} = {days:g} PT" for level, days in EFFORT_DAYS.items()))
+    
+    team_df = st.data_editor(
+        pd.DataFrame({
+            'Person': get_assignees() or ['Team'],
+            'Kapazität (%)': 100
+        }),
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        key="planning_team"
+    )
+    start_date = st.date_input("Beginn", value=date.today(), format="DD.MM.YYYY", key="planning_start")
+    team = {
+        str(row['Person']).strip(): float(row['Kapazität (%)'] or 0) / 100
+        for _, row in team_df.iterrows()
+        if str(row['Person'] or '').strip() and not pd.isna(row['Kapazität (%)'])
+    }
+    if not any(capacity > 0 for capacity in team.values()):
+        st.info("Bitte mindestens eine Person mit Kapazität eintragen.")
+        return
+    
+    planner = get_planner(tuple(control['id'] for control in filtered_controls), team, catalog_version)
+    plan = planner.plan()
+    if not plan:
+        st.success("Keine offenen Kontrollen in der Auswahl.")
+        return
+    
+    def to_date(days: float) -> date:
+        return workdays_to_date(start_date, math.ceil(days))
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Offene Kontrollen", len(plan))
+    with col2:
+        st.metric("Aufwand (PT)", f"{sum(item.effort_days for item in plan):g}")
+    with col3:
+        st.metric("Voraussichtlich fertig", to_date(max(item.finish for item in plan)).strftime('%d.%m.%Y'))
+    with col4:
+        st.metric("Zuletzt neu geplant", planner.last_replanned)
+    if planner.ignored_links:
+        st.warning("Zyklische Voraussetzungen ignoriert: "
+                   + ", ".join(f"{control} → {prerequisite}" for control, prerequisite in planner.ignored_links))
+    
+    df = pd.DataFrame([
+        {
+            'ID': item.control_id,
+            'Titel': controls_by_id[item.control_id]['title'] if item.control_id in controls_by_id else '',
+            'Person': item.person,
+            'Beginn': workdays_to_date(start_date, item.start),
+            'Ende': to_date(item.finish),
+            'Aufwand (PT)': item.effort_days,
+            'Wartet auf': ', '.join(item.waits_for),
+            'Im Filter': item.in_scope
+        }
+        for item in plan
+    ])
+    fig = px.timeline(df, x_start='Beginn', x_end='Ende', y='Person', color='Person',
+                      hover_data=['ID', 'Titel', 'Aufwand (PT)'])
+    fig.update_layout(showlegend=False, yaxis_title='')
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def show_status_dashboard(controls: List[Dict], catalog_version: str):
     st.header("Compliance Status Dashboard")
     
     # Debug info
@@ -632,6 +1056,9 @@ def show_status_dashboard():
         )
         st.plotly_chart(fig, use_container_width=True)
     
+    show_status_trend(controls, catalog_version)
+    show_workload()
+    
     # Show recent updates
     st.subheader("Letzte Aktualisierungen")
     c.execute('''
@@ -664,9 +1091,9 @@ def main():
     
     # Load data
     with st.spinner("Lade Daten..."):
-        data = load_data()
+        processed_data = load_data()
     
-    if not data:
+    if not processed_data:
         st.error("""
         Fehler beim Laden der Daten. Bitte überprüfen Sie:
         1. Die Datei 'Grundschutz++-Kompendium.json' existiert im gleichen Verzeichnis
@@ -675,12 +1102,16 @@ def main():
         """)
         return
     
-    # Process data
+    # Store today's status vector for the trend charts; if the database is busy,
+    # the next rerun records it instead of failing this one
     try:
-        processed_data = process_data(data)
-    except Exception as e:
-        st.error(f"Fehler bei der Datenverarbeitung: {str(e)}")
-        return
+        record_daily_snapshot(
+            db_conn,
+            [c['id'] for c in processed_data['all_controls']],
+            processed_data['catalog_version']
+        )
+    except sqlite3.OperationalError:
+        pass
     
     # Dark mode toggle
     dark_mode = st.sidebar.toggle('Dark Mode', value=st.session_state.get('dark_mode', False))
@@ -784,15 +1215,15 @@ def main():
     # Sidebar filters
     st.sidebar.header("Filter")
     
+    group_titles, classes, effort_levels = get_filter_options(db_conn)
+    
     # Group filter
-    group_titles = sorted(list(set(c.get('group_title', '') for c in processed_data['all_controls'] if c.get('group_title'))))
     selected_group = st.sidebar.selectbox(
         "Nach Gruppe filtern",
         options=["Alle"] + group_titles
     )
     
     # Class filter
-    classes = sorted(list(set(c.get('class', '') for c in processed_data['all_controls'] if c.get('class'))))
     selected_class = st.sidebar.multiselect(
         "Nach Klasse filtern",
         options=classes,
@@ -807,12 +1238,6 @@ def main():
     )
     
     # Effort level filter
-    effort_levels = sorted(list(set(
-        c.get('effort_level') 
-        for c in processed_data['all_controls'] 
-        if c.get('effort_level')
-    )))
-    
     if effort_levels:
         selected_efforts = st.sidebar.multiselect(
             "Nach Aufwand filtern",
@@ -824,84 +1249,58 @@ def main():
     
     # Search
     search_term = st.sidebar.text_input("Suche", "", key="search_input").lower()
-
-    # Apply filters
-    filtered_controls = processed_data['all_controls']
     
-    if selected_group != "Alle":
-        filtered_controls = [c for c in filtered_controls if c.get('group_title') == selected_group]
-    
-    if selected_class:
-        filtered_controls = [c for c in filtered_controls if c.get('class') in selected_class]
-    
-    if selected_efforts:
-        filtered_controls = [c for c in filtered_controls if c.get('effort_level') in selected_efforts]
-    
-    if search_term:
-        filtered_controls = [
-            c for c in filtered_controls
-            if (search_term in c.get('title', '').lower() or
-                search_term in c.get('id', '').lower() or
-                search_term in c.get('statement', '').lower() or
-                search_term in c.get('guidance', '').lower())
-        ]
+    # Task views over assignee and due date
+    task_view = st.sidebar.selectbox(
+        "Aufgaben",
+        options=["Alle Kontrollen", "Meine offenen Kontrollen", "Überfällig", "Fällig in 30 Tagen"],
+        key="task_view"
+    )
+    selected_assignee = None
+    if task_view == "Meine offenen Kontrollen":
+        assignees = get_assignees()
+        if assignees:
+            selected_assignee = st.sidebar.selectbox("Person", options=assignees, key="task_assignee")
+        else:
+            st.sidebar.info("Noch keine Kontrollen zugewiesen.")
+
+    # Apply all filters in one query against the catalog tables
+    status_map = {
+        "Alle": None,
+        "Erfüllt": "erfuellt",
+        "Nicht erfüllt": "nicht_erfuellt",
+        "Entbehrlich": "entbehrlich",
+        "Ohne Status": WITHOUT_STATUS
+    }
+    filters = {
+        'group_title': selected_group if selected_group != "Alle" else None,
+        'classes': selected_class,
+        'effort_levels': selected_efforts,
+        'status': status_map[selected_status],
+        'search': search_term
+    }
+    today = date.today()
+    if task_view == "Meine offenen Kontrollen":
+        filters.update(assignee=selected_assignee, open_only=True)
+    elif task_view == "Überfällig":
+        filters.update(due_before=today.isoformat(), open_only=True)
+    elif task_view == "Fällig in 30 Tagen":
+        filters.update(due_from=today.isoformat(), due_before=(today + timedelta(days=31)).isoformat(),
+                       open_only=True)
+    controls_by_id = processed_data['controls_by_id']
+    filtered_controls = [controls_by_id[control_id] for control_id in query_control_ids(db_conn, **filters)
+                         if control_id in controls_by_id]
+    if task_view == "Meine offenen Kontrollen" and not selected_assignee:
+        # Without any assignment nothing is "mine"
+        filtered_controls = []
     
     # Add export button after filters are applied
     st.sidebar.markdown("---")
     if st.sidebar.button("📊 Als CSV exportieren", key="export_button"):
         if filtered_controls:
-            import pandas as pd
-            from io import StringIO
-            
-            # Convert filtered controls to DataFrame
-            df = pd.DataFrame(filtered_controls)
-            
-            # Get status and notes for each control
-            status_notes = df['id'].apply(lambda x: get_control_status(x))
-            
-            # Add status and notes to the DataFrame
-            df['status'] = status_notes.apply(lambda x: x[0] or 'Ohne Status')
-            df['notes'] = status_notes.apply(lambda x: x[1] or '')
-            
-            # Add empty columns for additional fields
-            df['Verantwortlich'] = ''
-            df['Termin'] = ''
-            df['Begründung'] = ''
-            
-            # Select and reorder columns for export with German headers
-            column_mapping = {
-                'id': 'ID',
-                'title': 'Titel',
-                'group_title': 'Gruppe',
-                'subgroup_title': 'Untergruppe',
-                'effort_level': 'Aufwand',
-                'statement': 'Anforderung',
-                'guidance': 'Hinweise',
-                'class': 'Klasse',
-                'status': 'Status',
-                'notes': 'Notizen',
-                'ergebnis': 'Erwartetes Ergebnis',
-                'handlungsworte': 'Handlungsworte',
-                'präzisierung': 'Präzisierung',
-                'dokumentation': 'Dokumentation',
-                'tags': 'Tags',
-                'Verantwortlich': 'Verantwortlich',
-                'Termin': 'Termin',
-                'Begründung': 'Begründung'
-            }
-            
-            # Ensure all required columns exist
-            for col in column_mapping.keys():
-                if col not in df.columns and col not in ['Begründung', 'Verantwortlich', 'Termin']:
-                    df[col] = ''
-            
-            # Reorder and rename columns
-            df = df[list(column_mapping.keys())].rename(columns=column_mapping)
-            
-            # Ensure all string columns are properly encoded
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.encode('utf-8').str.decode('utf-8')
+            # One query joins catalog and status with German column names
+            sql, params = export_query(**filters)
+            df = pd.read_sql_query(sql, db_conn, params=params)
             
             # Convert to CSV with proper encoding
             csv = df.to_csv(index=False, sep=';', encoding='utf-8-sig', quotechar='"', quoting=1)
@@ -917,6 +1316,116 @@ def main():
         else:
             st.sidebar.warning("Keine Daten zum Exportieren vorhanden.")
     
+    # Printable report for the filtered controls
+    if st.sidebar.button("📄 Bericht erstellen", key="report_button"):
+        if filtered_controls:
+            with st.spinner("Erstelle Bericht..."):
+                report_html = generate_report(filtered_controls, load_statuses(db_conn),
+                                              catalog_version=processed_data['catalog_version'])
+                report_pdf = html_to_pdf(report_html)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            st.sidebar.download_button(
+                label="⬇️ HTML-Bericht herunterladen",
+                data=report_html.encode('utf-8'),
+                file_name=f'grundschutz_bericht_{timestamp}.html',
+                mime='text/html',
+                key="report_html_download"
+            )
+            if report_pdf is not None:
+                st.sidebar.download_button(
+                    label="⬇️ PDF-Bericht herunterladen",
+                    data=report_pdf,
+                    file_name=f'grundschutz_bericht_{timestamp}.pdf',
+                    mime='application/pdf',
+                    key="report_pdf_download"
+                )
+            else:
+                st.sidebar.caption("PDF-Export benötigt das Paket 'weasyprint'.")
+        else:
+            st.sidebar.warning("Keine Daten für den Bericht vorhanden.")
+    
+    # Replication with other installations
+    st.sidebar.markdown("---")
+    with st.sidebar.expander("🔄 Synchronisation"):
+        st.caption(f"Instanz: {get_instance_id(db_conn)}")
+        # Peers become known with their first changeset; their confirmations arrive with the next ones
+        peers = {peer: (confirmed, exported) for peer, confirmed, exported, _ in get_peers(db_conn)}
+        peer_id = st.selectbox(
+            "Zielinstanz",
+            options=[''] + list(peers.keys()),
+            format_func=lambda peer: f"{peer} (bestätigt bis {peers[peer][0]})" if peer else "Neue Instanz (alles)",
+            key="sync_peer"
+        )
+        if peer_id and peers[peer_id][1] > peers[peer_id][0]:
+            st.caption(f"Export bis {peers[peer_id][1]} noch nicht bestätigt; er wird erneut mitgeliefert.")
+        if st.button("Änderungen exportieren", key="sync_export_button"):
+            from io import BytesIO
+            buffer = BytesIO()
+            rows, to_seq = export_changeset(db_conn, buffer, peer_id or None)
+            st.download_button(
+                label=f"⬇️ {rows} Änderungen herunterladen",
+                data=buffer.getvalue(),
+                file_name=f'changeset_{get_instance_id(db_conn)[:8]}_{to_seq}.jsonl.gz',
+                mime='application/gzip',
+                key="sync_download_button"
+            )
+        changeset_files = st.file_uploader(
+            "Changesets übernehmen",
+            type=['gz'],
+            accept_multiple_files=True,
+            key="sync_upload"
+        )
+        if st.button("Übernehmen", key="sync_import_button", disabled=not changeset_files):
+            for changeset_file in changeset_files:
+                try:
+                    result = run_write_task(lambda conn: import_changeset(conn, changeset_file))
+                    st.success(f"{changeset_file.name}: {result['applied']} übernommen, "
+                               f"{result['skipped']} übersprungen")
+                except Exception as e:
+                    st.error(f"{changeset_file.name}: {str(e)}")
+    
+    with st.sidebar.expander("📥 Altdaten übernehmen"):
+        legacy_file = st.file_uploader("Export (CSV)", type=['csv', 'txt'], key="migration_upload")
+        mapping_file = st.file_uploader("Zuordnungstabelle (optional)", type=['csv', 'txt'],
+                                        key="migration_mapping_upload",
+                                        help="1. Spalte: alte Kennung, 2. Spalte: Kontroll-ID oder alt-identifier")
+        id_column = st.text_input("Spalte Kennung", value="ID", key="migration_id_column")
+        status_column = st.text_input("Spalte Status", value="Status", key="migration_status_column")
+        notes_column = st.text_input("Spalte Notizen", value="Notizen", key="migration_notes_column")
+        overwrite = st.checkbox("Bewertete Kontrollen überschreiben", key="migration_overwrite")
+        if st.button("Übernehmen", key="migration_button", disabled=legacy_file is None):
+            try:
+                result = run_write_task(lambda conn: migrate_statuses(
+                    conn,
+                    text_stream(legacy_file),
+                    text_stream(mapping_file) if mapping_file else None,
+                    id_column.strip(),
+                    status_column.strip(),
+                    notes_column.strip() or None,
+                    changed_by=f"Migration ({legacy_file.name})",
+                    overwrite=overwrite
+                ))
+                st.success(f"{result['rows']} Zeilen: {result['written']} Kontrollen übernommen, "
+                           f"{result['skipped_existing']} bereits bewertet")
+                if result['unmatched'] or result['invalid']:
+                    from io import StringIO
+                    report_buffer = StringIO()
+                    write_unmatched(result, report_buffer)
+                    st.warning(f"{len(result['unmatched'])} Zeilen ohne Zuordnung, "
+                               f"{len(result['invalid'])} mit unbekanntem Status")
+                    st.download_button(
+                        label="⬇️ Nicht übernommene Zeilen",
+                        data=report_buffer.getvalue().encode('utf-8-sig'),
+                        file_name='migration_nicht_zugeordnet.csv',
+                        mime='text/csv; charset=utf-8-sig',
+                        key="migration_unmatched_download"
+                    )
+                if result['unresolved_mapping']:
+                    st.caption(f"{len(result['unresolved_mapping'])} Einträge der Zuordnungstabelle "
+                               "verweisen auf unbekannte Kennungen.")
+            except Exception as e:
+                st.error(f"Fehler bei der Übernahme: {str(e)}")
+    
     # Add reset button at the bottom
     st.sidebar.markdown("---")
     if st.sidebar.checkbox("Datenbank zurücksetzen", key="reset_checkbox"):
@@ -926,38 +1435,21 @@ def main():
                            help="Klicken Sie hier, um alle Einträge zu löschen"):
             reset_database()
     
-    # Apply status filter
-    if selected_status != "Alle":
-        status_map = {
-            "Erfüllt": "erfuellt",
-            "Nicht erfüllt": "nicht_erfuellt",
-            "Entbehrlich": "entbehrlich"
-        }
-        if selected_status == "Ohne Status":
-            filtered_controls = [c for c in filtered_controls if not get_control_status(c['id'])[0]]
-        else:
-            filtered_controls = [c for c in filtered_controls if get_control_status(c['id'])[0] == status_map[selected_status]]
-    
     # Create tabs
-    tab1, tab2 = st.tabs(["Übersicht", "Kontrollen"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Übersicht", "Kontrollen", "Analyse", "Planung"])
     
     with tab1:
-        show_status_dashboard()
+        show_status_dashboard(processed_data['all_controls'], processed_data['catalog_version'])
     
     with tab2:
         # Display metrics
         st.markdown("### Übersicht")
-        total = len(processed_data['all_controls'])
-        # Get all statuses in a single query for better performance
-        statuses = {}
-        for c in processed_data['all_controls']:
-            status, _, _ = get_control_status(c['id'])
-            statuses[c['id']] = status
-        
-        # Count statuses
-        erfuellt = sum(1 for status in statuses.values() if status == "erfuellt")
-        nicht_erfuellt = sum(1 for status in statuses.values() if status == "nicht_erfuellt")
-        entbehrlich = sum(1 for status in statuses.values() if status == "entbehrlich")
+        # Count statuses with one GROUP BY over catalog and status
+        status_counts = count_statuses(db_conn)
+        total = sum(status_counts.values())
+        erfuellt = status_counts.get("erfuellt", 0)
+        nicht_erfuellt = status_counts.get("nicht_erfuellt", 0)
+        entbehrlich = status_counts.get("entbehrlich", 0)
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -980,8 +1472,17 @@ def main():
         if not filtered_controls:
             st.warning("Keine Kontrollen gefunden, die den ausgewählten Filtern entsprechen.")
         else:
+            similarity_index = load_similarity_index(processed_data['all_controls'],
+                                                     processed_data['catalog_version'])
+            evidence_files = list_evidence(db_conn)
             for control in filtered_controls:
-                display_control(control)
+                display_control(control, similarity_index, controls_by_id, evidence_files)
+    
+    with tab3:
+        show_analytics(processed_data['all_controls'], processed_data['catalog_version'])
+    
+    with tab4:
+        show_planning(filtered_controls, controls_by_id, processed_data['catalog_version'])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,309 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from kompendium import Catalog, Control, Group, prop, replace_params
+
+# Status filter value selecting controls without a status row
+WITHOUT_STATUS = ''
+# Controls that still need work: no status yet or not fulfilled
+OPEN_STATUS_CLAUSE = "(cs.status IS NULL OR cs.status IN ('', 'nicht_erfuellt'))"
+
+
+def init_catalog_schema(conn: sqlite3.Connection) -> None:
+    """Create the tables holding the Kompendium next to the status data"""
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_info (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            uuid TEXT,
+            version TEXT,
+            title TEXT,
+            last_modified TEXT,
+            imported_at TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_groups (
+            id TEXT PRIMARY KEY,
+            parent_id TEXT,
+            title TEXT,
+            position INTEGER
+        )
+    ''')
+    # Long texts are stored resolved (parameters replaced) as shown in the dashboard;
+    # search_text is the lower-cased haystack of the full-text search
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_controls (
+            id TEXT PRIMARY KEY,
+            parent_control_id TEXT,
+            group_id TEXT,
+            subgroup_id TEXT,
+            class TEXT,
+            title TEXT,
+            effort_level TEXT,
+            modalverb TEXT,
+            statement TEXT,
+            guidance TEXT,
+            ergebnis TEXT,
+            handlungsworte TEXT,
+            praezisierung TEXT,
+            dokumentation TEXT,
+            search_text TEXT,
+            position INTEGER
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_params (
+            id TEXT PRIMARY KEY,
+            control_id TEXT,
+            label TEXT
+        )
+    ''')
+    # Props of controls, parameters and parts; owner_id is the ID of the owning element
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_props (
+            owner_id TEXT,
+            name TEXT,
+            value TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_tags (
+            control_id TEXT,
+            tag TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_links (
+            control_id TEXT,
+            target_id TEXT,
+            rel TEXT
+        )
+    ''')
+
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_controls_filter '
+              'ON catalog_controls (parent_control_id, group_id, class, effort_level, position)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_groups_title ON catalog_groups (title, parent_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_params_control ON catalog_params (control_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_props_owner ON catalog_props (owner_id, name)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_props_name ON catalog_props (name, value)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_tags_control ON catalog_tags (control_id, tag)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_links_control ON catalog_links (control_id, rel, target_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_catalog_links_target ON catalog_links (target_id, rel)')
+    # The LEFT JOIN on control_status is a primary-key lookup; the former (control_id, status) index only slowed writes
+    c.execute('DROP INDEX IF EXISTS idx_control_status_join')
+
+
+def get_catalog_version(conn: sqlite3.Connection) -> Optional[str]:
+    """Version of the imported Kompendium, or None if none was imported yet"""
+    c = conn.cursor()
+    c.execute('SELECT version FROM catalog_info WHERE id = 1')
+    result = c.fetchone()
+    return result[0] if result else None
+
+
+def import_catalog(conn: sqlite3.Connection, catalog: Catalog, force: bool = False) -> bool:
+    """
+    Write the catalog into the catalog tables in one transaction.
+    Nothing is done if the same metadata.version is already imported.
+    Returns True if the tables were (re)written.
+    """
+    if not force and get_catalog_version(conn) == catalog.version:
+        return False
+
+    groups, controls, params, props, tags, links = [], [], [], [], [], []
+
+    def add_props(owner_id: str, owner_props: Dict[str, List[str]]) -> None:
+        for name, values in owner_props.items():
+            for value in values:
+                props.append((owner_id, name, value))
+
+    def add_control(control: Control, group: Group, subgroup: Optional[Group],
+                    parent: Optional[Control]) -> None:
+        statement = control.parts.get('statement')
+        guidance = control.parts.get('guidance')
+        statement_props = statement.props if statement else {}
+        statement_text = replace_params(statement.prose, catalog.params) if statement else ''
+        guidance_text = guidance.prose if guidance else ''
+        controls.append((
+            control.id,
+            parent.id if parent else None,
+            group.id,
+            subgroup.id if subgroup else None,
+            control.control_class,
+            control.title,
+            prop(control.props, 'effort_level', 'N/A'),
+            prop(statement_props, 'modalverb'),
+            statement_text,
+            guidance_text,
+            prop(statement_props, 'ergebnis'),
+            prop(statement_props, 'handlungsworte'),
+            prop(statement_props, 'präzisierung'),
+            prop(statement_props, 'dokumentation'),
+            '\n'.join([control.title, control.id, statement_text, guidance_text]).lower(),
+            len(controls)
+        ))
+        add_props(control.id, control.props)
+        for part in control.parts.values():
+            add_props(part.id or f'{control.id}_{part.name}', part.props)
+        for param in control.params:
+            params.append((param.id, control.id, param.label))
+            add_props(param.id, param.props)
+        for tag in control.props.get('tag', []):
+            tags.append((control.id, tag))
+        for link in control.links:
+            href = link.get('href', '')
+            links.append((control.id, href[1:] if href.startswith('#') else href, link.get('rel')))
+        for child in control.controls:
+            add_control(child, group, subgroup, control)
+
+    for group in catalog.groups:
+        groups.append((group.id, None, group.title, len(groups)))
+        for control in group.controls:
+            add_control(control, group, None, None)
+        for subgroup in group.groups:
+            groups.append((subgroup.id, group.id, subgroup.title, len(groups)))
+            for control in subgroup.controls:
+                add_control(control, group, subgroup, None)
+
+    c = conn.cursor()
+    try:
+        for table in ('catalog_groups', 'catalog_controls', 'catalog_params',
+                      'catalog_props', 'catalog_tags', 'catalog_links'):
+            c.execute(f'DELETE FROM {table}')
+        c.executemany('INSERT INTO catalog_groups VALUES (?, ?, ?, ?)', groups)
+        c.executemany(f'INSERT INTO catalog_controls VALUES ({", ".join("?" * 16)})', controls)
+        c.executemany('INSERT OR REPLACE INTO catalog_params VALUES (?, ?, ?)', params)
+        c.executemany('INSERT INTO catalog_props VALUES (?, ?, ?)', props)
+        c.executemany('INSERT INTO catalog_tags VALUES (?, ?)', tags)
+        c.executemany('INSERT INTO catalog_links VALUES (?, ?, ?)', links)
+        c.execute('''
+            INSERT OR REPLACE INTO catalog_info (id, uuid, version, title, last_modified, imported_at)
+            VALUES (1, ?, ?, ?, ?, ?)
+        ''', (catalog.uuid, catalog.version, catalog.metadata.get('title', ''),
+              catalog.metadata.get('last-modified', ''), datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+def get_filter_options(conn: sqlite3.Connection) -> Tuple[List[str], List[str], List[str]]:
+    """Distinct group titles, classes and effort levels of the dashboard controls"""
+    c = conn.cursor()
+    c.execute('SELECT DISTINCT title FROM catalog_groups WHERE parent_id IS NULL AND title != \'\' ORDER BY title')
+    group_titles = [row[0] for row in c.fetchall()]
+    c.execute('''
+        SELECT DISTINCT class FROM catalog_controls
+        WHERE parent_control_id IS NULL AND class != '' ORDER BY class
+    ''')
+    classes = [row[0] for row in c.fetchall()]
+    c.execute('''
+        SELECT DISTINCT effort_level FROM catalog_controls
+        WHERE parent_control_id IS NULL AND effort_level != '' ORDER BY effort_level
+    ''')
+    effort_levels = [row[0] for row in c.fetchall()]
+    return group_titles, classes, effort_levels
+
+
+def build_control_filter(group_title: Optional[str] = None, classes: Sequence[str] = (),
+                         effort_levels: Sequence[str] = (), status: Optional[str] = None,
+                         search: str = '', assignee: Optional[str] = None, due_from: Optional[str] = None,
+                         due_before: Optional[str] = None, open_only: bool = False) -> Tuple[str, List]:
+    """
+    WHERE clause over catalog_controls cc, catalog_groups g and control_status cs.
+    status None means any status, WITHOUT_STATUS selects controls without a status.
+    due_from/due_before are ISO dates bounding due_date (inclusive/exclusive).
+    """
+    clauses = ['cc.parent_control_id IS NULL']
+    params: List = []
+    if group_title:
+        clauses.append('g.title = ?')
+        params.append(group_title)
+    if classes:
+        clauses.append(f'cc.class IN ({", ".join("?" * len(classes))})')
+        params.extend(classes)
+    if effort_levels:
+        clauses.append(f'cc.effort_level IN ({", ".join("?" * len(effort_levels))})')
+        params.extend(effort_levels)
+    if status == WITHOUT_STATUS:
+        clauses.append("(cs.status IS NULL OR cs.status = '')")
+    elif status is not None:
+        clauses.append('cs.status = ?')
+        params.append(status)
+    if search:
+        clauses.append('instr(cc.search_text, ?) > 0')
+        params.append(search.lower())
+    # Task views look up control_status first, as a range scan on the assignee or due_date index
+    task_clauses = []
+    if assignee:
+        task_clauses.append('assignee = ?')
+        params.append(assignee)
+    if due_from:
+        task_clauses.append('due_date >= ?')
+        params.append(due_from)
+    if due_before:
+        task_clauses.append('due_date < ?')
+        params.append(due_before)
+    if task_clauses:
+        clauses.append(f'cc.id IN (SELECT control_id FROM control_status WHERE {" AND ".join(task_clauses)})')
+    if open_only:
+        clauses.append(OPEN_STATUS_CLAUSE)
+    return ' AND '.join(clauses), params
+
+
+CONTROL_JOIN = '''
+    FROM catalog_controls cc
+    JOIN catalog_groups g ON g.id = cc.group_id
+    LEFT JOIN catalog_groups sg ON sg.id = cc.subgroup_id
+    LEFT JOIN control_status cs ON cs.control_id = cc.id
+'''
+
+
+def query_control_ids(conn: sqlite3.Connection, **filters) -> List[str]:
+    """IDs of the controls matching the filters (see build_control_filter), in catalog order"""
+    where, params = build_control_filter(**filters)
+    c = conn.cursor()
+    c.execute(f'SELECT cc.id {CONTROL_JOIN} WHERE {where} ORDER BY cc.position', params)
+    return [row[0] for row in c.fetchall()]
+
+
+def count_statuses(conn: sqlite3.Connection, **filters) -> Dict[Optional[str], int]:
+    """Number of controls per status (None for controls without status)"""
+    where, params = build_control_filter(**filters)
+    c = conn.cursor()
+    c.execute(f'SELECT NULLIF(cs.status, \'\'), COUNT(*) {CONTROL_JOIN} WHERE {where} GROUP BY 1', params)
+    return dict(c.fetchall())
+
+
+def export_query(**filters) -> Tuple[str, List]:
+    """SELECT for the CSV export with German column names"""
+    where, params = build_control_filter(**filters)
+    sql = f'''
+        SELECT
+            cc.id AS "ID",
+            cc.title AS "Titel",
+            g.title AS "Gruppe",
+            COALESCE(sg.title, '') AS "Untergruppe",
+            cc.effort_level AS "Aufwand",
+            cc.statement AS "Anforderung",
+            cc.guidance AS "Hinweise",
+            cc.class AS "Klasse",
+            COALESCE(NULLIF(cs.status, ''), 'Ohne Status') AS "Status",
+            COALESCE(cs.notes, '') AS "Notizen",
+            COALESCE(cc.ergebnis, '') AS "Erwartetes Ergebnis",
+            COALESCE(cc.handlungsworte, '') AS "Handlungsworte",
+            COALESCE(cc.praezisierung, '') AS "Präzisierung",
+            COALESCE(cc.dokumentation, '') AS "Dokumentation",
+            COALESCE((SELECT group_concat(t.tag, ', ') FROM catalog_tags t WHERE t.control_id = cc.id), '') AS "Tags",
+            COALESCE(cs.assignee, '') AS "Verantwortlich",
+            COALESCE(cs.due_date, '') AS "Termin",
+            '' AS "Begründung"
+        {CONTROL_JOIN}
+        WHERE {where}
+        ORDER BY cc.position
+    '''
+    return sql, params
+
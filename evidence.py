@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+from typing import BinaryIO, List, Tuple
+
+# Blobs are stored once under evidence/<first two hex digits>/<sha256>
+EVIDENCE_DIR = 'evidence'
+CHUNK_SIZE = 1024 * 1024
+
+
+def init_evidence_schema(conn: sqlite3.Connection) -> None:
+    """Create the evidence metadata table and the control<->evidence link table"""
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS evidence (
+            sha256 TEXT PRIMARY KEY,
+            file_name TEXT,
+            size INTEGER,
+            mime_type TEXT,
+            uploaded_by TEXT,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS control_evidence (
+            control_id TEXT,
+            sha256 TEXT REFERENCES evidence(sha256),
+            linked_by TEXT,
+            linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (control_id, sha256)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_control_evidence_sha256 ON control_evidence (sha256)')
+
+
+def blob_path(sha256: str, root: str = EVIDENCE_DIR) -> str:
+    """Path of the blob with the given hash"""
+    return os.path.join(root, sha256[:2], sha256)
+
+
+def store_evidence(conn: sqlite3.Connection, fileobj: BinaryIO, file_name: str,
+                   mime_type: str = '', uploaded_by: str = '', root: str = EVIDENCE_DIR) -> str:
+    """
+    Hash and store a file chunk by chunk and return its SHA-256.
+    A file whose content is already stored is not written a second time.
+    """
+    os.makedirs(root, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256, root)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    c = conn.cursor()
+    c.execute('''
+        INSERT OR IGNORE INTO evidence (sha256, file_name, size, mime_type, uploaded_by)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (sha256, file_name, size, mime_type, uploaded_by))
+    conn.commit()
+    return sha256
+
+
+def link_evidence(conn: sqlite3.Connection, control_id: str, sha256: str, linked_by: str = '') -> None:
+    """Attach a stored file to a control"""
+    c = conn.cursor()
+    c.execute('''
+        INSERT OR IGNORE INTO control_evidence (control_id, sha256, linked_by)
+        VALUES (?, ?, ?)
+    ''', (control_id, sha256, linked_by))
+    conn.commit()
+
+
+def unlink_evidence(conn: sqlite3.Connection, control_id: str, sha256: str) -> None:
+    """Detach a file from a control; the blob stays available for other controls"""
+    c = conn.cursor()
+    c.execute('DELETE FROM control_evidence WHERE control_id = ? AND sha256 = ?', (control_id, sha256))
+    conn.commit()
+
+
+def get_control_evidence(conn: sqlite3.Connection, control_id: str) -> List[Tuple[str, str, int, str]]:
+    """Return (sha256, file_name, size, mime_type) of all files linked to a control"""
+    c = conn.cursor()
+    c.execute('''
+        SELECT e.sha256, e.file_name, e.size, e.mime_type
+        FROM control_evidence ce
+        JOIN evidence e ON e.sha256 = ce.sha256
+        WHERE ce.control_id = ?
+        ORDER BY e.file_name
+    ''', (control_id,))
+    return c.fetchall()
+
+
+def list_evidence(conn: sqlite3.Connection) -> List[Tuple[str, str, int, int]]:
+    """Return (sha256, file_name, size, number of linked controls) of all stored files"""
+    c = conn.cursor()
+    c.execute('''
+        SELECT e.sha256, e.file_name, e.size, COUNT(ce.control_id)
+        FROM evidence e
+        LEFT JOIN control_evidence ce ON ce.sha256 = e.sha256
+        GROUP BY e.sha256
+        ORDER BY e.file_name
+    ''')
+    return c.fetchall()
+
+
+def read_evidence(sha256: str, root: str = EVIDENCE_DIR) -> bytes:
+    """Content of a blob; the file is closed again before returning"""
+    with open(blob_path(sha256, root), 'rb') as f:
+        return f.read()
+
+
+def format_size(size: int) -> str:
+    """Human readable file size"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
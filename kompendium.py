@@ -0,0 +1,316 @@
+import json
+import mmap
+import re
+import sys
+import tempfile
+from array import array
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+KOMPENDIUM_FILE = 'Grundschutz++-Kompendium.json'
+PARAM_PATTERN = re.compile(r'\{\{\s*insert:\s*param,\s*([^}]+)\s*\}\}')
+
+# Props are indexed as name -> list of values, since OSCAL allows a name to repeat
+Props = Dict[str, List[str]]
+
+
+class Part(NamedTuple):
+    id: str
+    name: str
+    prose: str
+    props: Props
+    parts: Dict[str, 'Part']
+
+
+class Param(NamedTuple):
+    id: str
+    label: Optional[str]
+    props: Props
+
+
+class Control(NamedTuple):
+    id: str
+    control_class: str
+    title: str
+    props: Props
+    params: List[Param]
+    parts: Dict[str, Part]
+    links: List[Dict[str, str]]
+    controls: List['Control']
+
+
+class Group(NamedTuple):
+    id: str
+    title: str
+    props: Props
+    controls: List[Control]
+    groups: List['Group']
+
+
+class Catalog(NamedTuple):
+    uuid: str
+    metadata: Dict[str, Any]
+    version: str
+    groups: List[Group]
+    # Parameter labels of all controls by parameter ID
+    params: Dict[str, str]
+
+
+def prop(props: Props, name: str, default: Optional[str] = None) -> Optional[str]:
+    """First value of a prop, or default"""
+    values = props.get(name)
+    return values[0] if values else default
+
+
+def _index_props(items: Optional[List[Dict]]) -> Props:
+    props: Props = {}
+    for item in items or ():
+        props.setdefault(item.get('name'), []).append(item.get('value'))
+    return props
+
+
+def _decode_part(raw: Dict) -> Part:
+    parts: Dict[str, Part] = {}
+    for raw_part in raw.get('parts', ()):
+        part = _decode_part(raw_part)
+        # Like a linear search, the first part of a name wins
+        parts.setdefault(part.name, part)
+    return Part(
+        id=raw.get('id', ''),
+        name=raw.get('name', ''),
+        prose=raw.get('prose', ''),
+        props=_index_props(raw.get('props')),
+        parts=parts
+    )
+
+
+def _decode_control(raw: Dict, param_labels: Dict[str, str]) -> Control:
+    params = []
+    for raw_param in raw.get('params', ()):
+        param = Param(id=raw_param.get('id'), label=raw_param.get('label'),
+                      props=_index_props(raw_param.get('props')))
+        params.append(param)
+        if param.id and param.label is not None:
+            param_labels[param.id] = param.label
+
+    parts: Dict[str, Part] = {}
+    for raw_part in raw.get('parts', ()):
+        part = _decode_part(raw_part)
+        parts.setdefault(part.name, part)
+
+    return Control(
+        id=raw.get('id', ''),
+        control_class=raw.get('class', ''),
+        title=raw.get('title', ''),
+        props=_index_props(raw.get('props')),
+        params=params,
+        parts=parts,
+        links=raw.get('links', []),
+        controls=[_decode_control(child, param_labels) for child in raw.get('controls', ())]
+    )
+
+
+def _decode_group(raw: Dict, param_labels: Dict[str, str]) -> Group:
+    return Group(
+        id=raw.get('id', ''),
+        title=raw.get('title', ''),
+        props=_index_props(raw.get('props')),
+        controls=[_decode_control(control, param_labels) for control in raw.get('controls', ())],
+        groups=[_decode_group(group, param_labels) for group in raw.get('groups', ())]
+    )
+
+
+def decode_catalog(data: Dict) -> Catalog:
+    """Convert the parsed OSCAL document into typed records in a single walk"""
+    catalog = data.get('catalog', {})
+    metadata = catalog.get('metadata', {})
+    param_labels: Dict[str, str] = {}
+    groups = [_decode_group(group, param_labels) for group in catalog.get('groups', ())]
+    return Catalog(
+        uuid=catalog.get('uuid', ''),
+        metadata=metadata,
+        version=metadata.get('version', ''),
+        groups=groups,
+        params=param_labels
+    )
+
+
+def load_catalog(path: str = KOMPENDIUM_FILE) -> Catalog:
+    """Parse the Kompendium with orjson if it is installed, otherwise with the json module"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
+    return decode_catalog(data)
+
+
+def replace_params(text: str, params: Dict[str, str]) -> str:
+    """Replace parameter placeholders by their labels; unknown parameters show their ID in brackets"""
+    if '{{' not in text:
+        return text
+    return PARAM_PATTERN.sub(lambda match: params.get(match.group(1).strip(), f'[{match.group(1).strip()}]'), text)
+
+
+# Keys of a control record in the order the dashboard and exports expect them
+CONTROL_FIELDS = (
+    'id', 'class', 'title', 'effort_level', 'statement', 'guidance', 'group_id', 'group_title', 'type',
+    'ergebnis', 'handlungsworte', 'präzisierung', 'dokumentation', 'modalverb', 'tags',
+    'subgroup_id', 'subgroup_title'
+)
+# Long prose kept in the memory-mapped text store instead of on the record
+TEXT_FIELDS = ('statement', 'guidance', 'ergebnis', 'präzisierung', 'dokumentation')
+VALUE_FIELDS = tuple(field for field in CONTROL_FIELDS if field not in TEXT_FIELDS)
+# Short values that repeat across many controls and are interned
+INTERNED_FIELDS = ('class', 'effort_level', 'group_id', 'group_title', 'type', 'handlungsworte',
+                   'modalverb', 'subgroup_id', 'subgroup_title')
+
+_TEXT_INDEX = {field: index for index, field in enumerate(TEXT_FIELDS)}
+_VALUE_INDEX = {field: index for index, field in enumerate(VALUE_FIELDS)}
+_MISSING = object()
+
+
+class TextStore:
+    """
+    Long texts as UTF-8 in one file that is memory-mapped read-only.
+    The file is a private temporary file (mode 0600) that is unlinked right away, so no other
+    user can replace its content and nothing is left behind; the pages can still be evicted
+    to disk, and a text is only decoded when it is accessed.
+    """
+    __slots__ = ('_spans', '_map')
+
+    def __init__(self, texts: List[Optional[str]]):
+        # Two entries per text: byte offset and length, length -1 for None
+        self._spans = array('q')
+        chunks = []
+        offset = 0
+        for text in texts:
+            if text is None:
+                self._spans.extend((0, -1))
+                continue
+            data = text.encode('utf-8')
+            self._spans.extend((offset, len(data)))
+            chunks.append(data)
+            offset += len(data)
+        blob = b''.join(chunks)
+        del chunks
+
+        if not blob:
+            self._map = b''
+            return
+        with tempfile.TemporaryFile(prefix='grundschutz-texts-') as f:
+            f.write(blob)
+            f.flush()
+            # The mapping keeps the data alive after the file is closed
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get(self, index: int) -> Optional[str]:
+        offset, length = self._spans[2 * index], self._spans[2 * index + 1]
+        if length < 0:
+            return None
+        return self._map[offset:offset + length].decode('utf-8')
+
+
+class ControlRecord(Mapping):
+    """
+    Read-only control with the keys of the former control dicts.
+    Short fields live in a tuple, long prose in the shared TextStore.
+    """
+    __slots__ = ('_values', '_texts', '_text_base')
+
+    def __init__(self, values: tuple, texts: TextStore, text_base: int):
+        self._values = values
+        self._texts = texts
+        self._text_base = text_base
+
+    def __getitem__(self, key: str) -> Any:
+        index = _TEXT_INDEX.get(key)
+        if index is not None:
+            return self._texts.get(self._text_base + index)
+        value = self._values[_VALUE_INDEX[key]]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for field in CONTROL_FIELDS:
+            index = _VALUE_INDEX.get(field)
+            if index is None or self._values[index] is not _MISSING:
+                yield field
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ControlRecord({self._values[0]!r})"
+
+
+def process_data(catalog: Optional[Catalog]) -> Dict:
+    """Flatten the catalog into the control records used by the dashboard"""
+    if not catalog:
+        return {}
+
+    empty_part = Part('', '', '', {}, {})
+    rows = []
+
+    def process_control(control: Control, group: Group, subgroup: Optional[Group] = None) -> Dict:
+        statement = control.parts.get('statement', empty_part)
+        guidance = control.parts.get('guidance', empty_part)
+        control_data = {
+            'id': control.id,
+            'class': control.control_class,
+            'title': control.title,
+            'effort_level': prop(control.props, 'effort_level', 'N/A'),
+            'statement': replace_params(statement.prose, catalog.params),
+            'guidance': guidance.prose,
+            'group_id': group.id,
+            'group_title': group.title,
+            'type': 'group_control',
+            # Extract additional fields from statement props
+            'ergebnis': prop(statement.props, 'ergebnis'),
+            'handlungsworte': prop(statement.props, 'handlungsworte'),
+            'präzisierung': prop(statement.props, 'präzisierung'),
+            'dokumentation': prop(statement.props, 'dokumentation'),
+            'modalverb': prop(statement.props, 'modalverb'),
+            # Extract tags from control props
+            'tags': list(control.props.get('tag', []))
+        }
+        if subgroup:
+            control_data.update({
+                'subgroup_id': subgroup.id,
+                'subgroup_title': subgroup.title,
+                'type': 'subgroup_control'
+            })
+        return control_data
+
+    for group in catalog.groups:
+        # Process group-level controls
+        for control in group.controls:
+            rows.append(process_control(control, group))
+
+        # Process subgroup controls
+        for subgroup in group.groups:
+            for control in subgroup.controls:
+                rows.append(process_control(control, group, subgroup))
+
+    texts = TextStore([row[field] for row in rows for field in TEXT_FIELDS])
+    all_controls = []
+    for index, row in enumerate(rows):
+        for field in INTERNED_FIELDS:
+            if isinstance(row.get(field), str):
+                row[field] = sys.intern(row[field])
+        values = tuple(row.get(field, _MISSING) for field in VALUE_FIELDS)
+        all_controls.append(ControlRecord(values, texts, index * len(TEXT_FIELDS)))
+
+    return {
+        'all_controls': all_controls,
+        'controls_by_id': {control['id']: control for control in all_controls},
+        'total_controls': len(all_controls),
+        'total_groups': len(catalog.groups),
+        'catalog_version': catalog.version,
+        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
@@ -0,0 +1,291 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD = os.path.join(APP_DIR, 'Dashboard.py')
+DATA_FILES = ['Grundschutz++-Kompendium.json', 'grundschutz_status.db']
+ACTIONS = ['filter', 'search', 'save']
+SEARCH_TERMS = ['protokoll', 'backup', 'zugang', 'schulung', 'netz', 'notfall', '']
+STATUS_OPTIONS = ['Erfüllt', 'Nicht erfüllt', 'Entbehrlich']
+
+_stats_lock = threading.Lock()
+_latencies: Dict[str, List[float]] = {action: [] for action in ['start'] + ACTIONS}
+_db_stats = {'write_time': 0.0, 'max_write_time': 0.0, 'writes': 0, 'locked_errors': 0}
+_errors: List[str] = []
+
+
+def _record_write(duration: float) -> None:
+    with _stats_lock:
+        _db_stats['writes'] += 1
+        _db_stats['write_time'] += duration
+        _db_stats['max_write_time'] = max(_db_stats['max_write_time'], duration)
+
+
+def _record_error(message: str) -> None:
+    with _stats_lock:
+        _errors.append(message)
+
+
+def _record_locked(error: sqlite3.OperationalError) -> None:
+    if 'locked' in str(error):
+        with _stats_lock:
+            _db_stats['locked_errors'] += 1
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def _is_write(sql: str) -> bool:
+    words = sql.split(None, 1)
+    return bool(words) and words[0].upper() in WRITE_STATEMENTS
+
+
+def _timed_write(call, *args):
+    """Run a statement and record its duration, including waits on the database lock"""
+    start = time.perf_counter()
+    try:
+        return call(*args)
+    except sqlite3.OperationalError as e:
+        _record_locked(e)
+        raise
+    finally:
+        _record_write(time.perf_counter() - start)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that measures how long write statements take, including waits on the database lock"""
+
+    def execute(self, sql, parameters=()):
+        if not _is_write(sql):
+            return super().execute(sql, parameters)
+        return _timed_write(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _is_write(sql):
+            return super().executemany(sql, seq_of_parameters)
+        return _timed_write(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return _timed_write(super().executescript, sql_script)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection handing out TimedCursors and timing commits.
+    The execute shortcuts of sqlite3.Connection create their cursor internally without calling
+    cursor(), so they are routed through a TimedCursor explicitly.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        return _timed_write(super().commit)
+
+
+def _current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # Outside Linux only the peak is available, and on Windows not even that
+        try:
+            import resource
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _timed_run(at: AppTest, action: str) -> None:
+    start = time.perf_counter()
+    at.run()
+    duration = time.perf_counter() - start
+    with _stats_lock:
+        _latencies[action].append(duration)
+    for exception in at.exception:
+        _record_error(f"{action}: {exception.value}")
+
+
+def _do_filter(at: AppTest, rng: random.Random) -> None:
+    group_select = next((s for s in at.sidebar.selectbox if s.label == "Nach Gruppe filtern"), None)
+    if group_select is None:
+        raise LookupError('Gruppenfilter nicht gefunden')
+    group_select.set_value(rng.choice(group_select.options))
+    _timed_run(at, 'filter')
+
+
+def _do_search(at: AppTest, rng: random.Random) -> None:
+    at.sidebar.text_input(key="search_input").input(rng.choice(SEARCH_TERMS))
+    _timed_run(at, 'search')
+
+
+def _do_save(at: AppTest, rng: random.Random, session_id: int) -> None:
+    status_radios = [radio for radio in at.radio if radio.key and radio.key.endswith('_status')]
+    if not status_radios:
+        # The current filter shows no controls; fall back to a filter change
+        _do_filter(at, rng)
+        return
+    radio = rng.choice(status_radios)
+    control_id = radio.key[:-len('_status')]
+    radio.set_value(rng.choice(STATUS_OPTIONS))
+    at.text_input(key=f"{control_id}_name_input").input(f"Lasttest {session_id}")
+    at.text_area(key=f"{control_id}_notes").input("Lasttest")
+    submit = next((b for b in at.button if b.key and b.key.startswith(f"FormSubmitter:form_{control_id}")), None)
+    if submit is None:
+        raise LookupError(f'Speichern-Schaltfläche für {control_id} nicht gefunden')
+    submit.click()
+    _timed_run(at, 'save')
+
+
+def run_session(session_id: int, scratch_dir: str, iterations: int, seed: int, timeout: float,
+                barrier, results) -> None:
+    """
+    One simulated auditor in its own process: open the app, then filter, search and save in random order.
+    AppTest keeps one Streamlit runtime per process, so sessions cannot share a process.
+    """
+    os.chdir(scratch_dir)
+
+    # Every connection the app opens gets instrumented cursors
+    original_connect = sqlite3.connect
+    sqlite3.connect = lambda *a, **kw: original_connect(*a, factory=TimedConnection, **kw)
+
+    rng = random.Random(seed + session_id)
+    at = None
+    try:
+        at = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+        _timed_run(at, 'start')
+    except Exception as e:
+        _record_error(f"Session {session_id} start: {e!r}")
+        at = None
+    try:
+        # Start the interactions of all sessions together so that they overlap
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    if at is not None:
+        for _ in range(iterations):
+            action = rng.choice(ACTIONS)
+            # A failing action is recorded and the session goes on with the next one
+            try:
+                if action == 'filter':
+                    _do_filter(at, rng)
+                elif action == 'search':
+                    _do_search(at, rng)
+                else:
+                    _do_save(at, rng, session_id)
+            except Exception as e:
+                _record_error(f"Session {session_id} {action}: {e!r}")
+    results.put({
+        'latencies': _latencies,
+        'db_stats': _db_stats,
+        'errors': _errors,
+        'rss': _current_rss()
+    })
+
+
+def print_report(results: List[Dict], elapsed: float) -> None:
+    latencies: Dict[str, List[float]] = {action: [] for action in ['start'] + ACTIONS}
+    db_stats = {'write_time': 0.0, 'max_write_time': 0.0, 'writes': 0, 'locked_errors': 0}
+    errors: List[str] = []
+    for result in results:
+        for action, values in result['latencies'].items():
+            latencies[action].extend(values)
+        db_stats['writes'] += result['db_stats']['writes']
+        db_stats['write_time'] += result['db_stats']['write_time']
+        db_stats['max_write_time'] = max(db_stats['max_write_time'], result['db_stats']['max_write_time'])
+        db_stats['locked_errors'] += result['db_stats']['locked_errors']
+        errors.extend(result['errors'])
+    rss = [result['rss'] for result in results]
+
+    print(f"\n{len(results)} Sitzungen, Laufzeit {elapsed:.1f} s")
+    print(f"{'Aktion':<8} {'Anzahl':>6} {'p50 (s)':>9} {'p95 (s)':>9} {'p99 (s)':>9} {'max (s)':>9}")
+    for action, values in latencies.items():
+        if values:
+            print(f"{action:<8} {len(values):>6} {_percentile(values, 50):>9.3f} {_percentile(values, 95):>9.3f} "
+                  f"{_percentile(values, 99):>9.3f} {max(values):>9.3f}")
+    print(f"\nSQLite-Schreibvorgänge: {db_stats['writes']}, "
+          f"Gesamtzeit {db_stats['write_time']:.3f} s, längster {db_stats['max_write_time']:.3f} s, "
+          f"'database is locked': {db_stats['locked_errors']}")
+    if rss:
+        print(f"RSS je Sitzung: p50 {_percentile(rss, 50) / 2**20:.0f} MB, max {max(rss) / 2**20:.0f} MB")
+    if errors:
+        print(f"\n{len(errors)} Fehler:")
+        for error in sorted(set(errors))[:5]:
+            print(f"  {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Lasttest: simuliert gleichzeitige Sitzungen gegen eine Kopie der Datenbank.')
+    parser.add_argument('--sessions', type=int, default=20, help='Anzahl gleichzeitiger Sitzungen')
+    parser.add_argument('--iterations', type=int, default=5, help='Aktionen je Sitzung')
+    parser.add_argument('--db', default=os.path.join(APP_DIR, 'grundschutz_status.db'), help='Quelldatenbank (wird kopiert)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600, help='Maximale Dauer eines Reruns in Sekunden')
+    parser.add_argument('--keep', action='store_true', help='Arbeitsverzeichnis nicht löschen')
+    args = parser.parse_args()
+
+    # The app opens its files relative to the working directory, so it runs inside a scratch copy
+    scratch_dir = tempfile.mkdtemp(prefix='grundschutz-loadtest-')
+    for file_name in DATA_FILES:
+        source = args.db if file_name == 'grundschutz_status.db' else os.path.join(APP_DIR, file_name)
+        if os.path.exists(source):
+            shutil.copy(source, os.path.join(scratch_dir, file_name))
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.sessions)
+    results_queue = context.Queue()
+    processes = [
+        context.Process(target=run_session,
+                        args=(i, scratch_dir, args.iterations, args.seed, args.timeout, barrier, results_queue))
+        for i in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    # Drain the queue before joining, otherwise a child blocks on a full pipe
+    results = [results_queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    print_report(results, elapsed)
+    if args.keep:
+        print(f"Arbeitsverzeichnis: {scratch_dir}")
+    else:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
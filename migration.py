@@ -0,0 +1,278 @@
+import argparse
+import csv
+import io
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from catalog_store import import_catalog, init_catalog_schema
+from kompendium import KOMPENDIUM_FILE, load_catalog
+from sync import get_instance_id, init_sync_schema, next_status_seq
+
+# Rows written per transaction
+BATCH_SIZE = 2000
+
+# Status values of older tools and of the dashboard's own CSV export (compared case-insensitively)
+STATUS_ALIASES = {
+    'erfuellt': 'erfuellt',
+    'erfüllt': 'erfuellt',
+    'ja': 'erfuellt',
+    'umgesetzt': 'erfuellt',
+    'vollständig umgesetzt': 'erfuellt',
+    'yes': 'erfuellt',
+    'nicht_erfuellt': 'nicht_erfuellt',
+    'nicht erfüllt': 'nicht_erfuellt',
+    'nein': 'nicht_erfuellt',
+    'teilweise': 'nicht_erfuellt',
+    'teilweise umgesetzt': 'nicht_erfuellt',
+    'nicht umgesetzt': 'nicht_erfuellt',
+    'no': 'nicht_erfuellt',
+    'partial': 'nicht_erfuellt',
+    'entbehrlich': 'entbehrlich',
+    'entfällt': 'entbehrlich',
+    'nicht anwendbar': 'entbehrlich',
+    'n/a': 'entbehrlich',
+    'not applicable': 'entbehrlich',
+}
+# Values meaning "not assessed"; such rows are skipped without being reported
+EMPTY_STATUSES = {'', 'ohne status', 'offen', 'unbearbeitet'}
+
+# If several legacy rows land on one control, the least fulfilled status wins
+STATUS_PRECEDENCE = {'nicht_erfuellt': 0, 'erfuellt': 1, 'entbehrlich': 2}
+
+
+def normalize_key(value: str) -> str:
+    """Canonical form of an identifier: trimmed, case-insensitive, UUIDs without braces"""
+    return value.strip().strip('{}').casefold()
+
+
+def build_alias_index(conn: sqlite3.Connection) -> Dict[str, Optional[str]]:
+    """
+    Hash index from every known identifier to the dashboard control it belongs to:
+    control and sub-control IDs and the alt-identifier UUIDs of controls, sub-controls and
+    their parameters. Sub-controls are rolled up to their dashboard control.
+    Aliases pointing at two different controls map to None.
+    """
+    c = conn.cursor()
+    c.execute('SELECT id, parent_control_id FROM catalog_controls')
+    parents = dict(c.fetchall())
+
+    def top(control_id: str) -> str:
+        while parents.get(control_id):
+            control_id = parents[control_id]
+        return control_id
+
+    index: Dict[str, Optional[str]] = {}
+
+    def add(alias: str, control_id: str) -> None:
+        key = normalize_key(alias)
+        if index.get(key, control_id) != control_id:
+            index[key] = None
+        else:
+            index[key] = control_id
+
+    # Dashboard controls first, so their own IDs are never shadowed
+    for control_id, parent_id in parents.items():
+        if parent_id is None:
+            index[normalize_key(control_id)] = control_id
+    for control_id, parent_id in parents.items():
+        if parent_id is not None:
+            add(control_id, top(control_id))
+
+    c.execute('''
+        SELECT p.value, COALESCE(cp.control_id, p.owner_id)
+        FROM catalog_props p
+        LEFT JOIN catalog_params cp ON cp.id = p.owner_id
+        WHERE p.name = 'alt-identifier'
+    ''')
+    for alias, owner_id in c.fetchall():
+        if alias and owner_id in parents:
+            add(alias, top(owner_id))
+    return index
+
+
+def sniff_reader(fileobj: TextIO) -> Iterator[Dict[str, str]]:
+    """csv.DictReader with the delimiter detected from the first lines (German exports use ';')"""
+    sample = fileobj.read(8192)
+    fileobj.seek(0)
+    try:
+        return csv.DictReader(fileobj, dialect=csv.Sniffer().sniff(sample, delimiters=';,\t'))
+    except csv.Error:
+        return csv.DictReader(fileobj, delimiter=';')
+
+
+def add_mapping(index: Dict[str, Optional[str]], fileobj: TextIO) -> List[Tuple[str, str]]:
+    """
+    Extend the index with a mapping table: first column the legacy identifier, second column
+    any identifier the index already knows. Returns the entries whose target is unknown.
+    """
+    unresolved = []
+    reader = sniff_reader(fileobj)
+    if len(reader.fieldnames or []) < 2:
+        raise ValueError('Die Zuordnungstabelle braucht zwei Spalten')
+    legacy_column, target_column = reader.fieldnames[:2]
+    for row in reader:
+        legacy_id, target = row.get(legacy_column) or '', row.get(target_column) or ''
+        control_id = index.get(normalize_key(target))
+        if control_id:
+            index[normalize_key(legacy_id)] = control_id
+        elif legacy_id.strip():
+            unresolved.append((legacy_id, target))
+    return unresolved
+
+
+def resolve_rows(rows: Iterable[Dict[str, str]], index: Dict[str, Optional[str]], id_column: str,
+                 status_column: str, notes_column: Optional[str], result: Dict) -> Dict[str, Tuple[str, str]]:
+    """
+    Resolve legacy rows one at a time and merge them per control into (status, notes).
+    Unmatched rows and unknown status values are collected in result.
+    """
+    merged: Dict[str, Tuple[str, str]] = {}
+    for line, row in enumerate(rows, start=2):
+        result['rows'] += 1
+        legacy_id = (row.get(id_column) or '').strip()
+        raw_status = (row.get(status_column) or '').strip()
+        if raw_status.casefold() in EMPTY_STATUSES:
+            result['empty'] += 1
+            continue
+        status = STATUS_ALIASES.get(raw_status.casefold())
+        if status is None:
+            result['invalid'].append((line, legacy_id, raw_status))
+            continue
+        control_id = index.get(normalize_key(legacy_id))
+        if control_id is None:
+            result['unmatched'].append((line, legacy_id))
+            continue
+        result['matched'] += 1
+
+        notes = (row.get(notes_column) or '').strip() if notes_column else ''
+        if notes and normalize_key(legacy_id) != normalize_key(control_id):
+            notes = f'[{legacy_id}] {notes}'
+        if control_id in merged:
+            previous_status, previous_notes = merged[control_id]
+            status = min(status, previous_status, key=STATUS_PRECEDENCE.get)
+            if notes and notes not in previous_notes:
+                notes = f'{previous_notes}\n{notes}' if previous_notes else notes
+            else:
+                notes = previous_notes
+        merged[control_id] = (status, notes)
+    return merged
+
+
+def write_statuses(conn: sqlite3.Connection, merged: Dict[str, Tuple[str, str]], changed_by: str,
+                   overwrite: bool, result: Dict) -> None:
+    """Write the merged statuses in batches; assignee and due date of existing rows are kept"""
+    c = conn.cursor()
+    if not overwrite:
+        c.execute("SELECT control_id FROM control_status WHERE status IS NOT NULL AND status != ''")
+        assessed = {row[0] for row in c.fetchall()}
+        result['skipped_existing'] = sum(1 for control_id in merged if control_id in assessed)
+        merged = {control_id: value for control_id, value in merged.items() if control_id not in assessed}
+
+    origin = get_instance_id(conn)
+    items = list(merged.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        try:
+            c.executemany('''
+                INSERT INTO control_status (control_id, status, notes, changed_by, updated_at, seq, origin)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+                ON CONFLICT(control_id) DO UPDATE SET
+                    status = excluded.status, notes = excluded.notes, changed_by = excluded.changed_by,
+                    updated_at = excluded.updated_at, seq = excluded.seq, origin = excluded.origin
+            ''', [(control_id, status, notes, changed_by, next_status_seq(c), origin)
+                  for control_id, (status, notes) in batch])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        result['written'] += len(batch)
+
+
+def migrate_statuses(conn: sqlite3.Connection, legacy_file: TextIO, mapping_file: Optional[TextIO] = None,
+                     id_column: str = 'ID', status_column: str = 'Status', notes_column: Optional[str] = 'Notizen',
+                     changed_by: str = 'Migration', overwrite: bool = False) -> Dict:
+    """
+    Take over statuses from a legacy CSV export.
+    Rows are streamed and resolved through the alias index (plus the optional mapping table);
+    controls that already have a status are only changed with overwrite.
+    Returns counts and the unmatched ('unmatched': [(line, id)]) and
+    invalid ('invalid': [(line, id, status)]) rows.
+    """
+    result = {'rows': 0, 'matched': 0, 'empty': 0, 'written': 0, 'skipped_existing': 0,
+              'unmatched': [], 'invalid': [], 'unresolved_mapping': []}
+    index = build_alias_index(conn)
+    if mapping_file is not None:
+        result['unresolved_mapping'] = add_mapping(index, mapping_file)
+
+    reader = sniff_reader(legacy_file)
+    missing = [column for column in (id_column, status_column) if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Spalte(n) nicht gefunden: {', '.join(missing)}")
+    if notes_column not in reader.fieldnames:
+        notes_column = None
+
+    merged = resolve_rows(reader, index, id_column, status_column, notes_column, result)
+    write_statuses(conn, merged, changed_by, overwrite, result)
+    return result
+
+
+def write_unmatched(result: Dict, fileobj: TextIO) -> None:
+    """Write the rows that could not be taken over as a ';'-separated report"""
+    writer = csv.writer(fileobj, delimiter=';')
+    writer.writerow(['Zeile', 'Kennung', 'Grund'])
+    writer.writerows((line, legacy_id, 'Keine Zuordnung') for line, legacy_id in result['unmatched'])
+    writer.writerows((line, legacy_id, f'Unbekannter Status: {status}')
+                     for line, legacy_id, status in result['invalid'])
+
+
+def text_stream(binary: io.IOBase) -> TextIO:
+    """Decode an uploaded or opened binary file; a UTF-8 BOM (Excel) is removed"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Übernimmt Status aus Exporten älterer Werkzeuge.')
+    parser.add_argument('legacy', help='CSV-Export mit altem Bewertungsstand')
+    parser.add_argument('--db', default='grundschutz_status.db')
+    parser.add_argument('--kompendium', default=KOMPENDIUM_FILE, help='Pfad zum Kompendium (JSON)')
+    parser.add_argument('--mapping', help='CSV mit alter Kennung (1. Spalte) und neuer Kennung (2. Spalte)')
+    parser.add_argument('--id-column', default='ID')
+    parser.add_argument('--status-column', default='Status')
+    parser.add_argument('--notes-column', default='Notizen')
+    parser.add_argument('--changed-by', default='Migration', help='Name, der als Bearbeiter eingetragen wird')
+    parser.add_argument('--overwrite', action='store_true', help='Bereits bewertete Kontrollen überschreiben')
+    parser.add_argument('--unmatched', help='Nicht zugeordnete Zeilen in diese CSV-Datei schreiben')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    start = time.perf_counter()
+    try:
+        init_sync_schema(conn)
+        init_catalog_schema(conn)
+        conn.commit()
+        # The alias index is built from the catalog tables
+        import_catalog(conn, load_catalog(args.kompendium))
+        mapping_file = open(args.mapping, encoding='utf-8-sig', newline='') if args.mapping else None
+        try:
+            with open(args.legacy, encoding='utf-8-sig', newline='') as legacy_file:
+                result = migrate_statuses(conn, legacy_file, mapping_file, args.id_column, args.status_column,
+                                          args.notes_column, args.changed_by, args.overwrite)
+        finally:
+            if mapping_file:
+                mapping_file.close()
+    finally:
+        conn.close()
+
+    print(f"{result['rows']} Zeilen in {time.perf_counter() - start:.2f} s: {result['matched']} zugeordnet, "
+          f"{result['written']} Kontrollen geschrieben, {result['skipped_existing']} bereits bewertet, "
+          f"{len(result['unmatched'])} nicht zugeordnet, {len(result['invalid'])} mit unbekanntem Status")
+    for legacy_id, target in result['unresolved_mapping'][:10]:
+        print(f"  Zuordnung unbekannt: {legacy_id} -> {target}")
+    if args.unmatched:
+        with open(args.unmatched, 'w', encoding='utf-8-sig', newline='') as f:
+            write_unmatched(result, f)
+
+
+if __name__ == '__main__':
+    main()
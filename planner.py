@@ -0,0 +1,292 @@
+import bisect
+import heapq
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Person-days per effort_level of the Kompendium (0 = minimal, 5 = very high)
+EFFORT_DAYS = {'0': 0.5, '1': 1.0, '2': 2.0, '3': 5.0, '4': 10.0, '5': 20.0}
+DEFAULT_EFFORT_DAYS = 2.0
+
+# Statuses that still need work
+OPEN_STATUSES = (None, '', 'nicht_erfuellt')
+
+
+class PlanItem(NamedTuple):
+    control_id: str
+    person: str
+    # Working days from the start of the plan
+    start: float
+    finish: float
+    effort_days: float
+    # False for open prerequisites pulled in from outside the scope
+    in_scope: bool
+    # Open prerequisites that have to be finished first
+    waits_for: Tuple[str, ...]
+
+
+class _Slot(NamedTuple):
+    person: str
+    ready: float
+    start: float
+    finish: float
+
+
+def load_planning_data(conn: sqlite3.Connection) -> Tuple[Dict[str, Tuple[int, str]], List[Tuple[str, str]],
+                                                          Dict[str, Optional[str]]]:
+    """
+    Read the planning input from the catalog tables:
+    dashboard controls as {id: (position, effort_level)}, 'required' links as (control, prerequisite)
+    with sub-controls rolled up to their dashboard control, and the current statuses.
+    """
+    c = conn.cursor()
+    c.execute('SELECT id, parent_control_id, position, effort_level FROM catalog_controls')
+    parents, controls = {}, {}
+    for control_id, parent_id, position, effort_level in c.fetchall():
+        parents[control_id] = parent_id
+        if parent_id is None:
+            controls[control_id] = (position, effort_level)
+
+    def top(control_id: str) -> str:
+        while parents.get(control_id):
+            control_id = parents[control_id]
+        return control_id
+
+    c.execute("SELECT control_id, target_id FROM catalog_links WHERE rel = 'required'")
+    requires = {(top(control_id), top(target_id)) for control_id, target_id in c.fetchall() if target_id in parents}
+    c.execute('SELECT control_id, status FROM control_status')
+    statuses = dict(c.fetchall())
+    return controls, sorted(edge for edge in requires if edge[0] != edge[1]), statuses
+
+
+class RemediationPlanner:
+    """
+    Schedules the open controls of a scope onto a team.
+    Order: prerequisites first ('required' links), among ready controls the longest remaining
+    chain of effort first; each control goes to the person who is free earliest (list scheduling).
+    update_status() re-plans incrementally: only critical-path ranks of the changed control's
+    ancestors are recomputed, and the schedule is replayed from the earliest point in time
+    the change can influence; everything that starts before stays as it is.
+    """
+
+    def __init__(self, controls: Dict[str, Tuple[int, str]], requires: Iterable[Tuple[str, str]],
+                 statuses: Dict[str, Optional[str]], team: Dict[str, float],
+                 scope: Optional[Sequence[str]] = None):
+        # Persons with their capacity as fraction of a full-time position
+        self.team = {person: capacity for person, capacity in team.items() if capacity > 0}
+        self.position = {control_id: position for control_id, (position, _) in controls.items()}
+        self.effort = {control_id: EFFORT_DAYS.get(level, DEFAULT_EFFORT_DAYS)
+                       for control_id, (_, level) in controls.items()}
+
+        all_preds: Dict[str, Set[str]] = {}
+        for control_id, prerequisite in requires:
+            if control_id in controls and prerequisite in controls:
+                all_preds.setdefault(control_id, set()).add(prerequisite)
+
+        # Scope plus everything it transitively requires
+        self.in_scope = set(controls) if scope is None else {c for c in scope if c in controls}
+        universe = set(self.in_scope)
+        stack = list(universe)
+        while stack:
+            for prerequisite in all_preds.get(stack.pop(), ()):
+                if prerequisite not in universe:
+                    universe.add(prerequisite)
+                    stack.append(prerequisite)
+        self.universe = universe
+        self.preds = {u: {p for p in all_preds.get(u, ()) if p in universe} for u in universe}
+        self.ignored_links = self._break_cycles()
+        self.succs: Dict[str, Set[str]] = {u: set() for u in universe}
+        for u, prerequisites in self.preds.items():
+            for p in prerequisites:
+                self.succs[p].add(u)
+
+        self.active = {u for u in universe if statuses.get(u) in OPEN_STATUSES}
+        self.rank: Dict[str, float] = {}
+        for u in sorted(self.active, key=self.position.get):
+            self._compute_rank(u)
+        self.slots: Dict[str, _Slot] = {}
+        # Controls in the order they were scheduled; start times are non-decreasing
+        self.order: List[str] = []
+        # Times at which a person found nothing ready and had to wait
+        self.idle_times: List[float] = []
+        self.last_replanned = 0
+        self._schedule(0.0)
+
+    def _break_cycles(self) -> List[Tuple[str, str]]:
+        """Drop links that close a cycle, so that a topological order exists"""
+        ignored = []
+        state: Dict[str, int] = {}
+        for root in sorted(self.universe, key=self.position.get):
+            if root in state:
+                continue
+            state[root] = 1
+            stack = [(root, iter(sorted(self.preds[root], key=self.position.get)))]
+            while stack:
+                node, prerequisites = stack[-1]
+                for p in prerequisites:
+                    if state.get(p) == 1:
+                        self.preds[node].discard(p)
+                        ignored.append((node, p))
+                    elif p not in state:
+                        state[p] = 1
+                        stack.append((p, iter(sorted(self.preds[p], key=self.position.get))))
+                        break
+                else:
+                    state[node] = 2
+                    stack.pop()
+        return ignored
+
+    def _compute_rank(self, u: str) -> float:
+        """Effort of u plus the longest chain of open controls that depend on it"""
+        if u not in self.rank:
+            self.rank[u] = self.effort[u] + max(
+                (self._compute_rank(s) for s in self.succs[u] if s in self.active), default=0.0)
+        return self.rank[u]
+
+    def _ready_time(self, u: str, without: Optional[str] = None) -> float:
+        return max((self.slots[p].finish for p in self.preds[u]
+                    if p in self.active and p != without and p in self.slots), default=0.0)
+
+    def _schedule(self, since: float) -> None:
+        """(Re)schedule everything that starts at or after `since`"""
+        keep = 0
+        while keep < len(self.order) and self.slots[self.order[keep]].start < since:
+            keep += 1
+        for control_id in self.order[keep:]:
+            del self.slots[control_id]
+        del self.order[keep:]
+        del self.idle_times[bisect.bisect_left(self.idle_times, since):]
+
+        free = {person: 0.0 for person in self.team}
+        for control_id in self.order:
+            slot = self.slots[control_id]
+            free[slot.person] = max(free[slot.person], slot.finish)
+        persons = [(time, person) for person, time in free.items()]
+        heapq.heapify(persons)
+
+        waiting = {u: sum(1 for p in self.preds[u] if p in self.active and p not in self.slots)
+                   for u in self.active if u not in self.slots}
+        pending = [(self._ready_time(u), self.position[u], u) for u, count in waiting.items() if count == 0]
+        heapq.heapify(pending)
+        available: List[Tuple[float, int, float, str]] = []
+
+        replanned = 0
+        while persons and (pending or available):
+            time, person = heapq.heappop(persons)
+            while pending and pending[0][0] <= time:
+                ready, position, u = heapq.heappop(pending)
+                heapq.heappush(available, (-self.rank[u], position, ready, u))
+            if not available:
+                # Nothing to do yet: the person waits until the next control becomes ready
+                self.idle_times.append(time)
+                heapq.heappush(persons, (pending[0][0], person))
+                continue
+            _, _, ready, u = heapq.heappop(available)
+            finish = time + self.effort[u] / self.team[person]
+            self.slots[u] = _Slot(person, ready, time, finish)
+            self.order.append(u)
+            replanned += 1
+            heapq.heappush(persons, (finish, person))
+            for s in self.succs[u]:
+                if s in waiting:
+                    waiting[s] -= 1
+                    if waiting[s] == 0:
+                        heapq.heappush(pending, (self._ready_time(s), self.position[s], s))
+        self.last_replanned = replanned
+
+    def _priority(self, u: str) -> Tuple[float, int]:
+        return (-self.rank[u], self.position[u])
+
+    def _gain_bound(self, u: str, ready: float) -> float:
+        """
+        First point in time at which u, available from `ready` with its current priority,
+        changes a decision: a person waiting idle, or a control with lower priority being picked.
+        """
+        index = bisect.bisect_left(self.idle_times, ready)
+        bound = self.idle_times[index] if index < len(self.idle_times) else float('inf')
+        priority = self._priority(u)
+        for v in self.order:
+            start = self.slots[v].start
+            if start >= bound or v == u:
+                break
+            if start >= ready and self._priority(v) > priority:
+                return start
+        return bound
+
+    def update_status(self, control_id: str, status: Optional[str]) -> bool:
+        """Apply a status change; returns False if the plan is not affected"""
+        if control_id not in self.universe:
+            return False
+        was_open = control_id in self.active
+        is_open = status in OPEN_STATUSES
+        if was_open == is_open:
+            return False
+
+        # Earliest time any scheduling decision can differ after the change. A control that
+        # disappears or loses priority only matters from its start on, since it was not picked
+        # before; one that appears or gains priority matters from the time it is ready.
+        bounds = []
+        successors = [s for s in self.succs[control_id] if s in self.active]
+        if was_open:
+            bounds.append(self.slots[control_id].start if control_id in self.slots else 0.0)
+            # Successors may become ready earlier
+            bounds.extend(self._gain_bound(s, self._ready_time(s, without=control_id)) for s in successors)
+            self.active.discard(control_id)
+            del self.rank[control_id]
+            if control_id in self.slots:
+                del self.slots[control_id]
+                self.order.remove(control_id)
+        else:
+            # Successors become ready later
+            bounds.extend(self.slots[s].start for s in successors if s in self.slots)
+            self.active.add(control_id)
+
+        # Ranks only change along the chains of open prerequisites
+        ancestors = set()
+        stack = [control_id]
+        while stack:
+            for p in self.preds[stack.pop()]:
+                if p in self.active and p not in ancestors:
+                    ancestors.add(p)
+                    stack.append(p)
+        old_ranks = {u: self.rank.pop(u) for u in ancestors}
+        for u in ancestors:
+            self._compute_rank(u)
+        changed = [u for u in ancestors if self.rank[u] != old_ranks[u] and u in self.slots]
+        if was_open:
+            bounds.extend(self.slots[u].start for u in changed)
+        else:
+            self._compute_rank(control_id)
+            bounds.append(self._gain_bound(control_id, self._ready_time(control_id)))
+            bounds.extend(self._gain_bound(u, self.slots[u].ready) for u in changed)
+
+        self._schedule(min(bounds, default=0.0))
+        return True
+
+    def plan(self) -> List[PlanItem]:
+        """Scheduled controls in the order of their start"""
+        return [
+            PlanItem(
+                control_id=u,
+                person=self.slots[u].person,
+                start=self.slots[u].start,
+                finish=self.slots[u].finish,
+                effort_days=self.effort[u],
+                in_scope=u in self.in_scope,
+                waits_for=tuple(sorted((p for p in self.preds[u] if p in self.active), key=self.position.get))
+            )
+            for u in self.order
+        ]
+
+
+def workdays_to_date(start: date, days: float) -> date:
+    """Calendar date reached after a number of working days (Monday to Friday)"""
+    current = start
+    while current.weekday() >= 5:
+        current += timedelta(days=1)
+    remaining = int(days)
+    while remaining > 0:
+        current += timedelta(days=1)
+        if current.weekday() < 5:
+            remaining -= 1
+    return current
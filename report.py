@@ -0,0 +1,233 @@
+import argparse
+import html
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from kompendium import KOMPENDIUM_FILE, load_catalog, process_data
+
+STATUS_LABELS = {
+    'erfuellt': 'Erfüllt',
+    'nicht_erfuellt': 'Nicht erfüllt',
+    'entbehrlich': 'Entbehrlich'
+}
+
+# Fragments kept across reports; several statuses per control of the full catalog
+MAX_CACHED_FRAGMENTS = 4096
+
+# Rendered control fragments by (control ID, catalog version, status row), least recently used first
+_fragment_cache: 'OrderedDict[Tuple, str]' = OrderedDict()
+# Dashboard sessions render reports from different threads
+_fragment_lock = threading.Lock()
+
+REPORT_CSS = """
+body { font-family: Arial, Helvetica, sans-serif; color: #212529; margin: 2rem; }
+h1 { border-bottom: 2px solid #dee2e6; padding-bottom: 0.5rem; }
+h2 { margin-top: 2rem; page-break-before: always; }
+.summary td { padding: 0.25rem 1rem 0.25rem 0; }
+.control { border: 1px solid #e9ecef; border-left: 4px solid #6c757d; border-radius: 0.25rem;
+           padding: 0.75rem 1rem; margin: 1rem 0; page-break-inside: avoid; }
+.control.erfuellt { border-left-color: #28a745; }
+.control.nicht_erfuellt { border-left-color: #dc3545; }
+.control.entbehrlich { border-left-color: #ffc107; }
+.control h3 { margin: 0 0 0.5rem 0; font-size: 1.1rem; }
+.meta { color: #6c757d; font-size: 0.85rem; }
+.label { font-weight: bold; margin-top: 0.5rem; }
+"""
+
+
+def _text(value: Optional[str]) -> str:
+    """Escape a text field and keep its line breaks"""
+    return html.escape(value or '').replace('\n', '<br>')
+
+
+def fragment_key(control_id: str, catalog_version: str, status_row: Tuple) -> Tuple:
+    """Key of a control fragment; the control texts are fixed by the catalog version"""
+    return (control_id, catalog_version, status_row)
+
+
+def render_control(control: Dict, status_row: Tuple) -> str:
+    """Render the HTML fragment of a single control"""
+    status, notes, responsible, due_date = status_row
+    sections = [
+        ('Anforderung', control.get('statement')),
+        ('Hinweise', control.get('guidance')),
+        ('Erwartetes Ergebnis', control.get('ergebnis')),
+        ('Bemerkungen', notes)
+    ]
+    body = ''.join(
+        f'<div class="label">{label}</div><div>{_text(value)}</div>'
+        for label, value in sections if value
+    )
+    meta = ' · '.join(html.escape(part) for part in [
+        control.get('subgroup_title') or '',
+        f"Klasse: {control.get('class') or 'N/A'}",
+        f"Aufwand: {control.get('effort_level') or 'N/A'}",
+        f"Status: {STATUS_LABELS.get(status, 'Ohne Status')}",
+        f"Verantwortlich: {responsible or '-'}",
+        f"Termin: {due_date}" if due_date else ''
+    ] if part)
+    return (
+        f'<div class="control {html.escape(status or "")}">'
+        f'<h3>{html.escape(control.get("id", ""))} - {html.escape(control.get("title", ""))}</h3>'
+        f'<div class="meta">{meta}</div>{body}</div>'
+    )
+
+
+def _cached_fragment(control: Dict, catalog_version: str, status_row: Tuple) -> str:
+    """Rendered fragment of a control, from the LRU cache if the control and its status are unchanged"""
+    key = fragment_key(control['id'], catalog_version, status_row)
+    with _fragment_lock:
+        fragment = _fragment_cache.get(key)
+        if fragment is not None:
+            _fragment_cache.move_to_end(key)
+            return fragment
+    fragment = render_control(control, status_row)
+    with _fragment_lock:
+        _fragment_cache[key] = fragment
+        if len(_fragment_cache) > MAX_CACHED_FRAGMENTS:
+            _fragment_cache.popitem(last=False)
+    return fragment
+
+
+def generate_report(controls: List[Dict], statuses: Dict[str, Tuple],
+                    title: str = 'Grundschutz++ Compliance-Bericht', catalog_version: str = '') -> str:
+    """
+    Build a static HTML report with one section per group.
+    statuses maps a control ID to (status, notes, responsible person, due date).
+    """
+    groups: Dict[str, List[str]] = {}
+    counts = {label: 0 for label in list(STATUS_LABELS.values()) + ['Ohne Status']}
+    for control in controls:
+        status_row = tuple(statuses.get(control['id'], (None, None, None, None)))
+        counts[STATUS_LABELS.get(status_row[0], 'Ohne Status')] += 1
+        groups.setdefault(control.get('group_title', ''), []).append(
+            _cached_fragment(control, catalog_version, status_row))
+
+    summary = ''.join(f'<tr><td>{label}</td><td>{count}</td></tr>' for label, count in counts.items())
+    toc = ''.join(
+        f'<li><a href="#group-{index}">{html.escape(group_title)}</a> ({len(fragments)})</li>'
+        for index, (group_title, fragments) in enumerate(groups.items())
+    )
+    sections = ''.join(
+        f'<h2 id="group-{index}">{html.escape(group_title)}</h2>' + ''.join(fragments)
+        for index, (group_title, fragments) in enumerate(groups.items())
+    )
+    return (
+        '<!DOCTYPE html><html lang="de"><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)}</title><style>{REPORT_CSS}</style></head><body>'
+        f'<h1>{html.escape(title)}</h1>'
+        f'<p class="meta">Erstellt am {datetime.now().strftime("%d.%m.%Y %H:%M")} · '
+        f'{len(controls)} Kontrollen</p>'
+        f'<table class="summary">{summary}</table><ul>{toc}</ul>{sections}</body></html>'
+    )
+
+
+def html_to_pdf(html_doc: str) -> Optional[bytes]:
+    """Convert the report to PDF if WeasyPrint is installed, otherwise return None"""
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        return None
+    return HTML(string=html_doc).write_pdf()
+
+
+def load_statuses(conn: sqlite3.Connection) -> Dict[str, Tuple]:
+    """Read (status, notes, responsible person, due date) of all controls in one query"""
+    c = conn.cursor()
+    c.execute("PRAGMA table_info(control_status)")
+    columns = [column[1] for column in c.fetchall()]
+    # Databases of older installations have no assignment, or not even a name, yet
+    responsible = 'changed_by' if 'changed_by' in columns else 'NULL'
+    if 'assignee' in columns:
+        responsible = f"COALESCE(NULLIF(assignee, ''), {responsible})"
+    due_date = 'due_date' if 'due_date' in columns else 'NULL'
+    c.execute(f'SELECT control_id, status, notes, {responsible}, {due_date} FROM control_status')
+    return {row[0]: tuple(row[1:]) for row in c.fetchall()}
+
+
+# Catalog of a worker process, loaded once by _init_worker
+_worker_catalog: Dict = {}
+
+
+def _init_worker(kompendium: str) -> None:
+    _worker_catalog.update(process_data(load_catalog(kompendium)))
+
+
+# File name of the dashboard database; such files are named after their site directory
+DEFAULT_DATABASE = 'grundschutz_status.db'
+
+
+def site_name(database: str) -> str:
+    """
+    Name of the site a database belongs to: its directory for the dashboard's default file name
+    (site-a/grundschutz_status.db -> site-a), otherwise the file name without extension
+    """
+    path = os.path.abspath(database)
+    directory = os.path.basename(os.path.dirname(path))
+    if os.path.basename(path) == DEFAULT_DATABASE and directory:
+        return directory
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def write_site_report(database: str, name: str, out: str, pdf: bool) -> str:
+    """Render the report of one site database into out/<name>.html; runs in the worker processes"""
+    conn = sqlite3.connect(database)
+    try:
+        statuses = load_statuses(conn)
+    finally:
+        conn.close()
+    html_doc = generate_report(_worker_catalog['all_controls'], statuses,
+                               title=f'Grundschutz++ Compliance-Bericht – {name}',
+                               catalog_version=_worker_catalog['catalog_version'])
+    with open(os.path.join(out, f'{name}.html'), 'w', encoding='utf-8') as f:
+        f.write(html_doc)
+    message = f"{database}: {len(_worker_catalog['all_controls'])} Kontrollen -> {out}/{name}.html"
+    if pdf:
+        pdf_doc = html_to_pdf(html_doc)
+        if pdf_doc is None:
+            message += ' (WeasyPrint ist nicht installiert, PDF wird übersprungen)'
+        else:
+            with open(os.path.join(out, f'{name}.pdf'), 'wb') as f:
+                f.write(pdf_doc)
+    return message
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Erstellt HTML/PDF-Berichte für eine oder mehrere Statusdatenbanken.')
+    parser.add_argument('databases', nargs='+', help='Pfad zu grundschutz_status.db (je Standort eine Datei)')
+    parser.add_argument('--out', default='reports', help='Ausgabeverzeichnis')
+    parser.add_argument('--pdf', action='store_true', help='Zusätzlich PDF erzeugen (benötigt WeasyPrint)')
+    parser.add_argument('--kompendium', default=KOMPENDIUM_FILE, help='Pfad zum Kompendium (JSON)')
+    parser.add_argument('--workers', type=int, default=None, help='Anzahl Prozesse (Standard: alle Kerne)')
+    args = parser.parse_args()
+
+    names = [site_name(database) for database in args.databases]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        parser.error(f"Mehrere Datenbanken ergeben denselben Berichtsnamen: {', '.join(duplicates)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    if len(args.databases) == 1 or args.workers == 1:
+        _init_worker(args.kompendium)
+        messages = [write_site_report(database, name, args.out, args.pdf)
+                    for database, name in zip(args.databases, names)]
+    else:
+        # One task per site database; each worker loads the catalog once
+        workers = min(args.workers or os.cpu_count() or 1, len(args.databases))
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(args.kompendium,)) as pool:
+            messages = pool.map(write_site_report, args.databases, names,
+                                [args.out] * len(args.databases), [args.pdf] * len(args.databases))
+    for message in messages:
+        print(message)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import re
+import zlib
+from typing import Dict, List, Mapping, Sequence, Set, Tuple
+
+import numpy as np
+
+# Texts a control is compared by
+SIMILARITY_FIELDS = ('statement', 'guidance', 'ergebnis')
+# Characters per shingle; character n-grams also match inflections and parts of compound words
+SHINGLE_SIZE = 4
+# MinHash signature length = BANDS * ROWS; with 40 bands of 3 rows, pairs with a Jaccard
+# similarity of 0.35 become candidates with ~80 %, pairs above 0.5 with over 99 % probability
+BANDS = 40
+ROWS = 3
+# Suggestions below this estimated Jaccard similarity are dropped
+MIN_SIMILARITY = 0.35
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed character n-grams of a text with punctuation and case removed"""
+    normalized = ' '.join(_WORD.findall(text.lower()))
+    return {zlib.crc32(normalized[i:i + size].encode('utf-8')) for i in range(len(normalized) - size + 1)}
+
+
+class SimilarityIndex:
+    """
+    MinHash signatures of the control texts with an LSH band index.
+    A control is only compared with those sharing at least one band bucket, instead of with
+    every other control; the catalog is fixed, so all neighbour lists are computed up front.
+    """
+
+    def __init__(self, controls: Sequence[Mapping], bands: int = BANDS, rows: int = ROWS, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.int64)
+
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        for control in controls:
+            text = '\n'.join(control.get(field) or '' for field in SIMILARITY_FIELDS)
+            hashes = shingles(text)
+            if not hashes:
+                continue
+            signature = self.signature(hashes)
+            self.signatures[control['id']] = signature
+            for band in range(bands):
+                key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                self.buckets.setdefault(key, []).append(control['id'])
+        # All neighbours above MIN_SIMILARITY per control, best first
+        self.neighbours = {control_id: self._rank(control_id) for control_id in self.signatures}
+
+    def signature(self, hashes: Set[int]) -> np.ndarray:
+        """MinHash over universal hash functions (a * x + b) mod p"""
+        x = np.fromiter(hashes, dtype=np.int64, count=len(hashes)) % _PRIME
+        return ((self._a * x + self._b) % _PRIME).min(axis=1)
+
+    def _rank(self, control_id: str) -> List[Tuple[str, float]]:
+        signature = self.signatures[control_id]
+        candidates = set()
+        for band in range(self.bands):
+            candidates.update(self.buckets.get((band, signature[band * self.rows:(band + 1) * self.rows].tobytes()), ()))
+        candidates.discard(control_id)
+        scored = [(other, float(np.mean(self.signatures[other] == signature))) for other in candidates]
+        scored = [(other, score) for other, score in scored if score >= MIN_SIMILARITY]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+    def similar(self, control_id: str, limit: int = 5, min_similarity: float = MIN_SIMILARITY) -> List[Tuple[str, float]]:
+        """Most similar controls as (id, estimated Jaccard similarity), best first"""
+        return [(other, score) for other, score in self.neighbours.get(control_id, ())
+                if score >= min_similarity][:limit]
@@ -0,0 +1,158 @@
+import hashlib
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# 2-bit status codes; 0 doubles as padding for the last byte of a vector
+STATUS_CODES = {
+    'erfuellt': 1,
+    'nicht_erfuellt': 2,
+    'entbehrlich': 3
+}
+STATUS_NAMES = ['ohne_status', 'erfuellt', 'nicht_erfuellt', 'entbehrlich']
+
+# Lookup tables: the four codes packed into a byte, and how often each code occurs in it
+_BYTE_CODES = [tuple((b >> shift) & 0b11 for shift in (0, 2, 4, 6)) for b in range(256)]
+_BYTE_COUNTS = [tuple(codes.count(code) for code in range(4)) for codes in _BYTE_CODES]
+
+
+def init_snapshot_schema(conn: sqlite3.Connection) -> None:
+    """Create the tables holding the daily status vectors"""
+    c = conn.cursor()
+
+    # A layout fixes which control sits at which position of a vector
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_layouts (
+            layout_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            layout_hash TEXT UNIQUE,
+            catalog_version TEXT,
+            control_ids TEXT
+        )
+    ''')
+
+    # One bit-packed vector (2 bits per control) per day
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS status_snapshots (
+            snapshot_date TEXT PRIMARY KEY,
+            layout_id INTEGER REFERENCES snapshot_layouts(layout_id),
+            vector BLOB
+        )
+    ''')
+
+
+def pack_statuses(statuses: List[Optional[str]]) -> bytes:
+    """Pack a list of statuses into 2 bits per control"""
+    codes = [STATUS_CODES.get(status, 0) for status in statuses]
+    codes.extend([0] * (-len(codes) % 4))
+    return bytes(a | b << 2 | c << 4 | d << 6 for a, b, c, d in zip(*[iter(codes)] * 4))
+
+
+def unpack_statuses(vector: bytes, length: int) -> List[int]:
+    """Unpack a vector into one status code per control"""
+    return [code for byte in vector for code in _BYTE_CODES[byte]][:length]
+
+
+def count_statuses(vector: bytes, length: int) -> Dict[str, int]:
+    """Count the statuses of a vector without unpacking it"""
+    totals = [0, 0, 0, 0]
+    for byte in vector:
+        counts = _BYTE_COUNTS[byte]
+        totals[1] += counts[1]
+        totals[2] += counts[2]
+        totals[3] += counts[3]
+    totals[0] = length - totals[1] - totals[2] - totals[3]
+    return dict(zip(STATUS_NAMES, totals))
+
+
+def _layout_hash(joined: str) -> str:
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()
+
+
+def _find_layout_id(conn: sqlite3.Connection, layout_hash: str) -> Optional[int]:
+    c = conn.cursor()
+    c.execute('SELECT layout_id FROM snapshot_layouts WHERE layout_hash = ?', (layout_hash,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def record_daily_snapshot(conn: sqlite3.Connection, control_ids: List[str],
+                          catalog_version: str = '', day: Optional[date] = None) -> bool:
+    """
+    Store today's status vector for all controls.
+    The row of a day is overwritten until the day is over, so the last state of the day wins.
+    Unchanged vectors are detected with reads only, so the write lock is only taken after a change.
+    Returns True if a new or changed vector was written.
+    """
+    snapshot_date = (day or date.today()).isoformat()
+    c = conn.cursor()
+    c.execute('SELECT control_id, status FROM control_status')
+    statuses = dict(c.fetchall())
+    vector = pack_statuses([statuses.get(control_id) for control_id in control_ids])
+
+    joined = '\n'.join(control_ids)
+    layout_hash = _layout_hash(joined)
+    layout_id = _find_layout_id(conn, layout_hash)
+    if layout_id is not None:
+        c.execute('SELECT layout_id, vector FROM status_snapshots WHERE snapshot_date = ?', (snapshot_date,))
+        if c.fetchone() == (layout_id, vector):
+            return False
+
+    try:
+        if layout_id is None:
+            # Another session may insert the same layout at the same moment; the hash is unique either way
+            c.execute('''
+                INSERT OR IGNORE INTO snapshot_layouts (layout_hash, catalog_version, control_ids)
+                VALUES (?, ?, ?)
+            ''', (layout_hash, catalog_version, joined))
+            layout_id = _find_layout_id(conn, layout_hash)
+        c.execute('''
+            INSERT OR REPLACE INTO status_snapshots (snapshot_date, layout_id, vector)
+            VALUES (?, ?, ?)
+        ''', (snapshot_date, layout_id, vector))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return True
+
+
+def _load_layouts(conn: sqlite3.Connection) -> Dict[int, List[str]]:
+    c = conn.cursor()
+    c.execute('SELECT layout_id, control_ids FROM snapshot_layouts')
+    return {layout_id: control_ids.split('\n') if control_ids else [] for layout_id, control_ids in c.fetchall()}
+
+
+def load_status_trend(conn: sqlite3.Connection) -> List[Tuple[str, Dict[str, int]]]:
+    """Return (date, status counts) for every stored day, oldest first"""
+    layouts = _load_layouts(conn)
+    c = conn.cursor()
+    c.execute('SELECT snapshot_date, layout_id, vector FROM status_snapshots ORDER BY snapshot_date')
+    return [(snapshot_date, count_statuses(vector, len(layouts.get(layout_id, []))))
+            for snapshot_date, layout_id, vector in c.fetchall()]
+
+
+def load_group_trend(conn: sqlite3.Connection,
+                     control_groups: Dict[str, str]) -> List[Tuple[str, str, Dict[str, int]]]:
+    """
+    Return (date, group, status counts) for every stored day and group, oldest first.
+    control_groups maps a control ID to its group; controls missing from it are skipped.
+    """
+    layouts = _load_layouts(conn)
+    # Position -> group per layout, computed once instead of once per day
+    positions = {
+        layout_id: [control_groups.get(control_id) for control_id in control_ids]
+        for layout_id, control_ids in layouts.items()
+    }
+
+    c = conn.cursor()
+    c.execute('SELECT snapshot_date, layout_id, vector FROM status_snapshots ORDER BY snapshot_date')
+    trend = []
+    for snapshot_date, layout_id, vector in c.fetchall():
+        groups = positions.get(layout_id, [])
+        totals: Dict[str, List[int]] = {}
+        for group, code in zip(groups, unpack_statuses(vector, len(groups))):
+            if group is not None:
+                totals.setdefault(group, [0, 0, 0, 0])[code] += 1
+        for group in sorted(totals):
+            trend.append((snapshot_date, group, dict(zip(STATUS_NAMES, totals[group]))))
+    return trend
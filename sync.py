@@ -0,0 +1,300 @@
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+CHANGESET_FORMAT = 'grundschutz-changeset'
+CHANGESET_VERSION = 2
+# Columns of control_status that travel between installations
+SYNC_COLUMNS = ['control_id', 'status', 'notes', 'changed_by', 'assignee', 'due_date', 'updated_at', 'origin']
+
+
+def init_sync_schema(conn: sqlite3.Connection) -> None:
+    """Add sequence numbers and origin to control_status and create the sync bookkeeping tables"""
+    c = conn.cursor()
+
+    # Key/value table; 'status_revision' is the sequence number of the last local write
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_instance (
+            instance_id TEXT PRIMARY KEY
+        )
+    ''')
+    c.execute('SELECT instance_id FROM sync_instance')
+    if c.fetchone() is None:
+        c.execute('INSERT INTO sync_instance (instance_id) VALUES (?)', (uuid.uuid4().hex,))
+
+    # Watermarks per remote installation (keyed by its instance ID):
+    # last_exported_seq - end of the last changeset written for the peer, not yet confirmed
+    # confirmed_seq - the peer has imported everything up to here; exports start after it
+    # last_imported_seq - everything of the peer up to here has been imported without gaps
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            peer_id TEXT PRIMARY KEY,
+            last_exported_seq INTEGER DEFAULT 0,
+            last_imported_seq INTEGER DEFAULT 0,
+            last_sync TIMESTAMP
+        )
+    ''')
+    c.execute("PRAGMA table_info(sync_peers)")
+    if 'confirmed_seq' not in [column[1] for column in c.fetchall()]:
+        c.execute('ALTER TABLE sync_peers ADD COLUMN confirmed_seq INTEGER DEFAULT 0')
+
+    # Same tables the dashboard creates, so the CLIs also work on a database it has not opened yet
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS control_status (
+            control_id TEXT PRIMARY KEY,
+            status TEXT,
+            notes TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    c.execute("PRAGMA table_info(control_status)")
+    columns = [column[1] for column in c.fetchall()]
+    if 'seq' not in columns:
+        c.execute('ALTER TABLE control_status ADD COLUMN seq INTEGER')
+    if 'origin' not in columns:
+        c.execute('ALTER TABLE control_status ADD COLUMN origin TEXT')
+    # Replicated columns the dashboard adds, so the CLIs also work on older databases
+    for column in ('changed_by', 'assignee', 'due_date'):
+        if column not in columns:
+            c.execute(f'ALTER TABLE control_status ADD COLUMN {column} TEXT')
+
+    # Rows written before sync existed get sequence numbers after the current revision
+    c.execute('SELECT COUNT(*) FROM control_status WHERE seq IS NULL')
+    if c.fetchone()[0]:
+        base = get_status_seq(conn)
+        c.execute('UPDATE control_status SET seq = ? + rowid WHERE seq IS NULL', (base,))
+        c.execute('SELECT MAX(seq) FROM control_status')
+        _set_status_seq(c, c.fetchone()[0])
+        c.execute('UPDATE control_status SET origin = ? WHERE origin IS NULL', (get_instance_id(conn),))
+
+    c.execute('CREATE INDEX IF NOT EXISTS idx_control_status_seq ON control_status (seq)')
+
+
+def get_instance_id(conn: sqlite3.Connection) -> str:
+    """Random ID of this installation, created with the schema"""
+    c = conn.cursor()
+    c.execute('SELECT instance_id FROM sync_instance')
+    return c.fetchone()[0]
+
+
+def get_status_seq(conn: sqlite3.Connection) -> int:
+    """Sequence number of the last write to control_status"""
+    c = conn.cursor()
+    c.execute("SELECT value FROM db_meta WHERE key = 'status_revision'")
+    result = c.fetchone()
+    return result[0] if result else 0
+
+
+def _set_status_seq(c: sqlite3.Cursor, value: int) -> None:
+    c.execute('''
+        INSERT INTO db_meta (key, value) VALUES ('status_revision', ?)
+        ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+    ''', (value,))
+
+
+def next_status_seq(c: sqlite3.Cursor) -> int:
+    """Increment and return the sequence number; call inside every transaction that writes control_status"""
+    c.execute('''
+        INSERT INTO db_meta (key, value) VALUES ('status_revision', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+    c.execute("SELECT value FROM db_meta WHERE key = 'status_revision'")
+    return c.fetchone()[0]
+
+
+def get_peers(conn: sqlite3.Connection) -> List[Tuple[str, int, int, int]]:
+    """Return (peer_id, confirmed_seq, last_exported_seq, last_imported_seq) of all known installations"""
+    c = conn.cursor()
+    c.execute('''
+        SELECT peer_id, COALESCE(confirmed_seq, 0), COALESCE(last_exported_seq, 0), COALESCE(last_imported_seq, 0)
+        FROM sync_peers
+        ORDER BY peer_id
+    ''')
+    return c.fetchall()
+
+
+def export_changeset(conn: sqlite3.Connection, fileobj: BinaryIO, peer_id: Optional[str] = None,
+                     since_seq: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Write all rows changed after the watermark as gzip-compressed JSON lines.
+    Without since_seq the export starts after what peer_id has confirmed, so a changeset that
+    never arrives is simply contained in the next one. The header carries this installation's
+    import watermarks, which confirm the receipt of the peers' changesets.
+    Returns (number of rows, sequence number the changeset ends at).
+    """
+    c = conn.cursor()
+    if since_seq is None:
+        since_seq = 0
+        if peer_id:
+            c.execute('SELECT COALESCE(confirmed_seq, 0) FROM sync_peers WHERE peer_id = ?', (peer_id,))
+            result = c.fetchone()
+            since_seq = result[0] if result else 0
+
+    to_seq = get_status_seq(conn)
+    c.execute(f'''
+        SELECT {', '.join(SYNC_COLUMNS)}
+        FROM control_status
+        WHERE seq > ? AND seq <= ?
+        ORDER BY seq
+    ''', (since_seq, to_seq))
+    rows = c.fetchall()
+
+    c.execute('SELECT peer_id, last_imported_seq FROM sync_peers WHERE last_imported_seq > 0')
+    header = {
+        'format': CHANGESET_FORMAT,
+        'version': CHANGESET_VERSION,
+        'instance_id': get_instance_id(conn),
+        'from_seq': since_seq,
+        'to_seq': to_seq,
+        'rows': len(rows),
+        'acks': dict(c.fetchall()),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with gzip.GzipFile(fileobj=fileobj, mode='wb') as gz:
+        gz.write((json.dumps(header) + '\n').encode('utf-8'))
+        for row in rows:
+            gz.write((json.dumps(dict(zip(SYNC_COLUMNS, row)), ensure_ascii=False) + '\n').encode('utf-8'))
+
+    if peer_id:
+        # Only bookkeeping; the watermark the next export starts from moves with the peer's confirmation
+        c.execute('''
+            INSERT INTO sync_peers (peer_id, last_exported_seq, last_sync) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(peer_id) DO UPDATE SET last_exported_seq = excluded.last_exported_seq,
+                                               last_sync = CURRENT_TIMESTAMP
+        ''', (peer_id, to_seq))
+        conn.commit()
+    return len(rows), to_seq
+
+
+def _version(row: Dict) -> Tuple[str, str]:
+    # Last writer wins; the origin breaks ties so every installation picks the same row
+    return (row.get('updated_at') or '', row.get('origin') or '')
+
+
+def import_changeset(conn: sqlite3.Connection, fileobj: BinaryIO) -> Dict[str, int]:
+    """
+    Merge a changeset in one transaction.
+    A row replaces the local one if it is newer by (updated_at, origin), so the result does not
+    depend on the order in which changesets arrive. Applied rows get a new local sequence number
+    and are passed on with the next export.
+    Returns counts of 'applied' and 'skipped' rows.
+    """
+    with gzip.GzipFile(fileobj=fileobj, mode='rb') as gz:
+        lines = iter(gz)
+        header = json.loads(next(lines))
+        if header.get('format') != CHANGESET_FORMAT or header.get('version') != CHANGESET_VERSION:
+            raise ValueError('Unbekanntes Changeset-Format')
+        incoming = [json.loads(line) for line in lines if line.strip()]
+
+    result = {'applied': 0, 'skipped': 0}
+    if header['instance_id'] == get_instance_id(conn):
+        result['skipped'] = len(incoming)
+        return result
+
+    c = conn.cursor()
+    local = {}
+    control_ids = [row['control_id'] for row in incoming]
+    # Fetch the local versions in chunks to stay below SQLite's variable limit
+    for start in range(0, len(control_ids), 500):
+        chunk = control_ids[start:start + 500]
+        c.execute(f'''
+            SELECT control_id, updated_at, origin FROM control_status
+            WHERE control_id IN ({', '.join('?' * len(chunk))})
+        ''', chunk)
+        for control_id, updated_at, origin in c.fetchall():
+            local[control_id] = {'updated_at': updated_at, 'origin': origin}
+
+    winners = []
+    for row in incoming:
+        if row['control_id'] in local and _version(row) <= _version(local[row['control_id']]):
+            result['skipped'] += 1
+        else:
+            winners.append(row)
+
+    try:
+        for row in winners:
+            row['seq'] = next_status_seq(c)
+        c.executemany(f'''
+            INSERT OR REPLACE INTO control_status ({', '.join(SYNC_COLUMNS)}, seq)
+            VALUES ({', '.join('?' * (len(SYNC_COLUMNS) + 1))})
+        ''', [[row.get(column) for column in SYNC_COLUMNS] + [row['seq']] for row in winners])
+        # The import watermark only moves if the changeset continues it without a gap
+        c.execute('''
+            INSERT INTO sync_peers (peer_id, last_imported_seq, last_sync)
+            VALUES (?, CASE WHEN ? = 0 THEN ? ELSE 0 END, CURRENT_TIMESTAMP)
+            ON CONFLICT(peer_id) DO UPDATE SET
+                last_imported_seq = CASE WHEN ? <= last_imported_seq THEN MAX(last_imported_seq, ?)
+                                         ELSE last_imported_seq END,
+                last_sync = CURRENT_TIMESTAMP
+        ''', (header['instance_id'], header['from_seq'], header['to_seq'], header['from_seq'], header['to_seq']))
+        # The sender confirms what it has imported from us
+        confirmed = (header.get('acks') or {}).get(get_instance_id(conn))
+        if confirmed:
+            c.execute('''
+                UPDATE sync_peers SET confirmed_seq = MAX(COALESCE(confirmed_seq, 0), ?) WHERE peer_id = ?
+            ''', (confirmed, header['instance_id']))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    result['applied'] = len(winners)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Gleicht Statusdaten zwischen Installationen über Changesets ab.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Änderungen seit dem letzten Export schreiben')
+    export_parser.add_argument('--db', default='grundschutz_status.db')
+    export_parser.add_argument('--peer', help='Instanz-ID der Zielinstanz (ab deren bestätigtem Stand exportieren)')
+    export_parser.add_argument('--since', type=int, help='Ab dieser Sequenznummer exportieren')
+    export_parser.add_argument('--out', required=True, help='Zieldatei (.jsonl.gz)')
+
+    import_parser = subparsers.add_parser('import', help='Changesets zusammenführen')
+    import_parser.add_argument('--db', default='grundschutz_status.db')
+    import_parser.add_argument('files', nargs='+', help='Changeset-Dateien')
+
+    args = parser.parse_args()
+    # An export from a mistyped path would silently create an empty database
+    if args.command == 'export' and not os.path.exists(args.db):
+        parser.error(f'Datenbank nicht gefunden: {args.db}')
+    conn = sqlite3.connect(args.db)
+    try:
+        init_sync_schema(conn)
+        conn.commit()
+        if args.command == 'export':
+            with open(args.out, 'wb') as f:
+                rows, to_seq = export_changeset(conn, f, args.peer, args.since)
+            print(f'{rows} Änderungen bis Sequenz {to_seq} -> {args.out}')
+        else:
+            for file_name in args.files:
+                with open(file_name, 'rb') as f:
+                    result = import_changeset(conn, f)
+                print(f"{file_name}: {result['applied']} übernommen, {result['skipped']} übersprungen")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
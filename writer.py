@@ -0,0 +1,186 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple, Union
+
+from sync import get_instance_id, next_status_seq
+
+# Most mutations committed in one transaction
+MAX_BATCH = 256
+# How long the writer waits for further mutations after the first one (seconds)
+MAX_DELAY = 0.005
+
+
+class StatusChange(NamedTuple):
+    control_id: str
+    # None only updates assignee and due date and keeps the current status and notes
+    status: Optional[str]
+    notes: str = ''
+    changed_by: str = ''
+    assignee: Optional[str] = None
+    # ISO date
+    due_date: Optional[str] = None
+
+
+# Bulk write run on the writer's connection; it commits itself
+StatusTask = Callable[[sqlite3.Connection], Any]
+_Item = Tuple[Union[StatusChange, StatusTask], Future]
+
+
+class StatusWriter:
+    """
+    Single writer thread for status saves.
+    Callers enqueue StatusChanges and get a Future; the writer collects what arrives within
+    MAX_DELAY (at most MAX_BATCH changes) and commits it in one transaction, so simultaneous
+    saves share one commit instead of queuing for the database lock one after another.
+    Bulk writes (imports, migration, reset) are enqueued as tasks and run between batches.
+    """
+
+    def __init__(self, database: str, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.changes = 0
+        self._queue: 'queue.Queue[Optional[_Item]]' = queue.Queue()
+        # Guards _stopped, so nothing is enqueued after the thread has drained the queue
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='status-writer', daemon=True)
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        with self._lock:
+            return not self._stopped
+
+    def submit(self, change: Union[StatusChange, StatusTask]) -> Future:
+        """
+        Enqueue a change or a task; the future resolves with the sequence number of the change
+        or the return value of the task once it is committed
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(RuntimeError('Status writer is not running'))
+            else:
+                self._queue.put((change, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit everything queued so far and stop the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect(self) -> Tuple[List[_Item], Optional[_Item], bool]:
+        """
+        Block for the first change, then gather more until the batch is full or the delay is over.
+        Returns (changes, task to run after them, stopping).
+        """
+        item = self._queue.get()
+        if item is None:
+            return [], None, True
+        if callable(item[0]):
+            return [], item, False
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, None, True
+            if callable(item[0]):
+                return batch, item, False
+            batch.append(item)
+        return batch, None, False
+
+    def _apply(self, c: sqlite3.Cursor, origin: str, change: StatusChange) -> int:
+        seq = next_status_seq(c)
+        if change.status is None:
+            c.execute('''
+                INSERT INTO control_status (control_id, changed_by, assignee, due_date, updated_at, seq, origin)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+                ON CONFLICT(control_id) DO UPDATE SET
+                    changed_by = excluded.changed_by, assignee = excluded.assignee, due_date = excluded.due_date,
+                    updated_at = excluded.updated_at, seq = excluded.seq, origin = excluded.origin
+            ''', (change.control_id, change.changed_by, change.assignee, change.due_date, seq, origin))
+        else:
+            c.execute('''
+                INSERT OR REPLACE INTO control_status
+                (control_id, status, notes, changed_by, assignee, due_date, updated_at, seq, origin)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
+            ''', (change.control_id, change.status, change.notes, change.changed_by, change.assignee,
+                  change.due_date, seq, origin))
+        # Remember the name for the suggestions of the next save
+        if change.changed_by:
+            c.execute('''
+                INSERT INTO users (name, last_used)
+                VALUES (?, CURRENT_TIMESTAMP)
+                ON CONFLICT(name) DO UPDATE SET last_used = CURRENT_TIMESTAMP
+            ''', (change.changed_by,))
+        return seq
+
+    def _commit(self, conn: sqlite3.Connection, origin: str, batch: List[Tuple[StatusChange, Future]]) -> None:
+        c = conn.cursor()
+        try:
+            seqs = [self._apply(c, origin, change) for change, _ in batch]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if len(batch) == 1:
+                raise
+            # Commit one by one, so that only the faulty change fails
+            for item in batch:
+                self._commit_single(conn, origin, item)
+            return
+        self.batches += 1
+        self.changes += len(batch)
+        for (_, future), seq in zip(batch, seqs):
+            future.set_result(seq)
+
+    def _commit_single(self, conn: sqlite3.Connection, origin: str, item: Tuple[StatusChange, Future]) -> None:
+        try:
+            self._commit(conn, origin, [item])
+        except Exception as e:
+            item[1].set_exception(e)
+
+    def _run_task(self, conn: sqlite3.Connection, item: _Item) -> None:
+        task, future = item
+        try:
+            future.set_result(task(conn))
+        except Exception as e:
+            conn.rollback()
+            future.set_exception(e)
+
+    def _run(self) -> None:
+        try:
+            conn = sqlite3.connect(self.database, timeout=30)
+            try:
+                origin = get_instance_id(conn)
+                stopping = False
+                while not stopping:
+                    batch, task, stopping = self._collect()
+                    if len(batch) == 1:
+                        self._commit_single(conn, origin, batch[0])
+                    elif batch:
+                        # Falls back to single commits on errors, so it does not raise
+                        self._commit(conn, origin, batch)
+                    if task is not None:
+                        self._run_task(conn, task)
+            finally:
+                conn.close()
+        finally:
+            # Whatever is still queued will never be committed; let the callers know right away
+            with self._lock:
+                self._stopped = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and not item[1].done():
+                    item[1].set_exception(RuntimeError('Status writer is not running'))